@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Per-block cost of the audio level analysis, the struct based original
+# against the NumPy implementation in experiments/sound/amplitude.py.
+
+import argparse
+import math
+import os
+import struct
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'experiments', 'sound'))
+
+from amplitude import Amplitude  # noqa: E402
+from vu_constants import INPUT_FRAMES_PER_BLOCK, SHORT_NORMALIZE  # noqa: E402
+
+CHANNELS = 2
+
+
+def from_data_struct(block):
+    count = len(block) / 2
+    shorts = struct.unpack("%dh" % count, block)
+    sum_squares = sum(s**2 * SHORT_NORMALIZE**2 for s in shorts)
+    return Amplitude(math.sqrt(sum_squares / count))
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    block = rng.integers(-32768, 32768, args.frames * CHANNELS, dtype=np.int16).tobytes()
+
+    assert math.isclose(from_data_struct(block).value, Amplitude.from_data(block).value, rel_tol=1e-6)
+
+    print('%-20s %12s' % ('implementation', 'us / block'))
+    for name, func in [
+        ('struct', lambda: from_data_struct(block)),
+        ('numpy rms', lambda: Amplitude.from_data(block)),
+        ('numpy levels', lambda: Amplitude.levels_from_data(block, CHANNELS)),
+    ]:
+        number = 20 if name == 'struct' else 2000
+        best = min(timeit.repeat(func, number=number, repeat=args.repeat))
+        print('%-20s %12.1f' % (name, best / number * 1e6))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Audio level benchmark.')
+    parser.add_argument('--frames', type=int, default=INPUT_FRAMES_PER_BLOCK, help='Frames per block')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions, best is reported')
+    main(parser.parse_args())
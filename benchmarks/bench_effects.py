@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Runs every effect headless against a RecordingStrip for a fixed number of
+# frames, on a virtual clock and with seeded random generators, and reports
+# per-frame latency percentiles for a sweep of strip lengths. Results are
+# written as JSON so two revisions can be compared with --baseline.
+#
+# By default the strip takes whole frames through set_pixels(). The real
+# pyledstrip LedStrip has no such call, so on hardware every frame buffer
+# write goes through set_pixel_rgb() one LED at a time; --no-bulk measures
+# that path.
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import zlib
+
+import numpy as np
+
+import headless
+
+headless.install()
+
+SIZES = [300, 3000, 30000]
+PHYSICS = os.path.join(headless.ROOT, 'experiments', 'physics')
+LAMPRECHT = os.path.join(headless.ROOT, 'experiments', 'lamprecht')
+
+
+def _boomerangs(strip, seed):
+    from boomerangs import Boomerangs
+    return Boomerangs(strip).update, Boomerangs.PERIOD
+
+
+def _disco(strip, seed):
+    from disco import Disco
+    return Disco(strip, seed=seed).update, Disco.PERIOD
+
+
+def _fireworks(strip, seed):
+    from fireworks import Fireworks
+    return Fireworks(strip, seed=seed).update, Fireworks.PERIOD
+
+
+def _mod(strip, seed):
+    from mod import Mod
+    return Mod(strip).update, Mod.PERIOD
+
+
+def _noise(strip, seed):
+    from noise import Noise
+    return Noise(strip, seed=seed).update, Noise.PERIOD
+
+
+def _rainbow(strip, seed):
+    from rainbow import Rainbow
+    effect = Rainbow(strip)
+    return lambda strip: effect.update(), Rainbow.PERIOD
+
+
+def _sines(strip, seed):
+    from sines import Sines
+    return Sines(strip).update, Sines.PERIOD
+
+
+def _smooth(strip, seed):
+    from smooth import Smooth
+    effect = Smooth(strip)
+    return lambda strip: effect.update(), Smooth.PERIOD
+
+
+def _snake(strip, seed):
+    from snake import Snake
+    return Snake(strip).update, Snake.PERIOD
+
+
+def _walker(strip, seed):
+    from walker import Walker
+    effect = Walker(strip, seed=seed)
+    return lambda strip: effect.update(), Walker.PERIOD
+
+
+def _lamprecht_zwo(strip, seed):
+    import LamprechtZwo
+    return LamprechtZwo.World(strip, seed=seed).update, LamprechtZwo.PERIOD
+
+
+def _gradient(strip, seed):
+    import gradient
+    from heightmap import Heightmap
+
+    game = gradient.Game(strip, Heightmap.load(os.path.join(PHYSICS, gradient.HEIGHTMAP)))
+    return lambda strip: game.render(gradient.Game.PERIOD), gradient.Game.PERIOD
+
+
+# name, module whose clock is virtualized, factory, strip keyword arguments,
+# directory the module is imported from
+EFFECTS = [
+    ('boomerangs', 'boomerangs', _boomerangs, {}, headless.ROOT),
+    ('disco', 'disco', _disco, {}, headless.ROOT),
+    ('fireworks', 'fireworks', _fireworks, {}, headless.ROOT),
+    ('mod', 'mod', _mod, {}, headless.ROOT),
+    ('noise', 'noise', _noise, {}, headless.ROOT),
+    ('rainbow', 'rainbow', _rainbow, {'loop': True}, headless.ROOT),
+    ('sines', 'sines', _sines, {}, headless.ROOT),
+    ('smooth', 'smooth', _smooth, {'loop': True}, headless.ROOT),
+    ('snake', 'snake', _snake, {}, headless.ROOT),
+    ('walker', 'walker', _walker, {'loop': True}, headless.ROOT),
+    ('lamprecht_zwo', 'LamprechtZwo', _lamprecht_zwo, {'loop': True}, LAMPRECHT),
+    ('gradient', 'gradient', _gradient, {}, PHYSICS),
+]
+
+
+def revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=headless.ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(name, module_name, factory, strip_args, path, led_count, frames, seed, bulk=True):
+    # import first, some effects reseed their generators at import time
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    module = importlib.import_module(module_name)
+
+    random.seed(seed)
+    np.random.seed(seed)
+    strip = headless.RecordingStrip(led_count=led_count, max_frames=frames, bulk=bulk, **strip_args)
+    clock = headless.VirtualClock()
+
+    update, period = factory(strip, seed)
+    if hasattr(module, 'time'):
+        module.time = clock
+
+    latencies = np.empty(frames, dtype=np.int64)
+    perf_counter_ns = time.perf_counter_ns
+    for i in range(frames):
+        start = perf_counter_ns()
+        update(strip)
+        latencies[i] = perf_counter_ns() - start
+        clock.advance(period)
+
+    crc = 0
+    for frame in strip.frames:
+        crc = zlib.crc32(frame.tobytes(), crc)
+
+    latencies_ms = latencies / 1e6
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return {
+        'effect': name,
+        'led_count': led_count,
+        'bulk': bulk,
+        'frames': frames,
+        'transmits': strip.transmits,
+        'p50_ms': round(float(p50), 4),
+        'p90_ms': round(float(p90), 4),
+        'p99_ms': round(float(p99), 4),
+        'max_ms': round(float(latencies_ms.max()), 4),
+        'mean_ms': round(float(latencies_ms.mean()), 4),
+        'fps': round(float(1000 / latencies_ms.mean()), 1),
+        'crc32': '%08x' % crc,
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        report = json.load(f)
+    baseline = {(r['effect'], r['led_count']): r for r in report['results']}
+    print()
+    if results and report.get('bulk', True) != results[0]['bulk']:
+        print('baseline %s bulk writes, this run %s' % (
+            'used' if report.get('bulk', True) else 'did not use', 'does' if results[0]['bulk'] else 'does not'))
+    print('%-14s %8s %12s %12s %8s %s' % ('effect', 'leds', 'base p50', 'p50', 'ratio', 'output'))
+    for result in results:
+        old = baseline.get((result['effect'], result['led_count']))
+        if old is None:
+            continue
+        print('%-14s %8d %12.4f %12.4f %7.2fx %s' % (
+            result['effect'], result['led_count'], old['p50_ms'], result['p50_ms'],
+            result['p50_ms'] / old['p50_ms'] if old['p50_ms'] else float('inf'),
+            'same' if old['crc32'] == result['crc32'] else 'CHANGED'
+        ))
+
+
+def main(args):
+    selected = [effect for effect in EFFECTS if not args.effects or effect[0] in args.effects]
+
+    results = []
+    print('%-14s %8s %10s %10s %10s %10s %10s' % ('effect', 'leds', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'fps'))
+    for name, module_name, factory, strip_args, path in selected:
+        for led_count in args.sizes:
+            try:
+                result = run(name, module_name, factory, strip_args, path, led_count, args.frames, args.seed,
+                             args.bulk)
+            except (ImportError, OSError) as e:
+                print('%-14s skipped: %s' % (name, e))
+                break
+            results.append(result)
+            print('%-14s %8d %10.4f %10.4f %10.4f %10.4f %10.1f' % (
+                name, led_count, result['p50_ms'], result['p90_ms'], result['p99_ms'], result['max_ms'], result['fps']
+            ))
+
+    report = {
+        'revision': revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'frames': args.frames,
+        'seed': args.seed,
+        'bulk': args.bulk,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('wrote %s' % args.output)
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Headless effect benchmark.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='LED counts to sweep')
+    parser.add_argument('--frames', type=int, default=120, help='Frames per effect and size')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for all random generators')
+    parser.add_argument('--effects', nargs='+', help='Only run these effects')
+    parser.add_argument('--output', default='bench_effects.json', help='Result file')
+    parser.add_argument('--baseline', help='Earlier result file to compare against')
+    parser.add_argument('--no-bulk', dest='bulk', action='store_false',
+                        help='Write frames one LED at a time like the real LedStrip')
+    main(parser.parse_args())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Per-frame cost of the frame buffer ports (Sines, Mod) against the original
+# per-LED implementations, at several strip lengths. The ports are timed on a
+# strip that takes the frame in one set_pixels() call and on one without it,
+# like the real LedStrip, where the frame goes out one set_pixel_rgb() per LED.
+
+import argparse
+import math
+import time
+import timeit
+
+import headless
+
+headless.install()
+
+from mod import Mod  # noqa: E402
+from sines import Sines  # noqa: E402
+
+SIZES = [300, 3000, 30000]
+
+
+def sines_per_led(strip):
+    for i in range(strip.led_count):
+        strip.set_pixel_rgb(
+            i,
+            0.5 + 0.5 * math.sin(float(time.time() + 0) / 2.5 + float(i + 0) / 200.0 + 0.0),
+            0.5 * 0.5 * math.sin(float(time.time() + 7.5) / 1.75 + float(i + 100) / 200.0 + 1.3),
+            0.5 * 0.5 * math.sin(float(time.time() + 25) / 3.25 + float(i + 200) / 200.0 + 2.1)
+        )
+    strip.transmit()
+
+
+def mod_per_led(strip):
+    for pos in range(strip.led_count):
+        strip.set_hsv(
+            pos,
+            (int(time.time() / Mod.SEC_PER_STEP + pos / Mod.POS_PER_STEP) * Mod.HUE_PER_STEP) % 1.0,
+            1.0,
+            1.0
+        )
+    strip.transmit()
+
+
+def per_frame_ms(func, strip, repeat):
+    number = max(1, int(30000 / strip.led_count))
+    best = min(timeit.repeat(lambda: func(strip), number=number, repeat=repeat))
+    return best / number * 1000
+
+
+def main(args):
+    print('%-8s %8s %14s %14s %14s %10s %10s' % ('effect', 'leds', 'per-led ms', 'bulk ms', 'per-pixel ms',
+                                                   'bulk', 'per-pixel'))
+    for led_count in args.sizes:
+        strip = headless.FakeLedStrip(led_count=led_count)
+        per_pixel_strip = headless.FakeLedStrip(led_count=led_count, bulk=False)
+        for name, legacy, effect in [
+            ('sines', sines_per_led, Sines(strip)),
+            ('mod', mod_per_led, Mod(strip)),
+        ]:
+            legacy_ms = per_frame_ms(legacy, strip, args.repeat)
+            frame_ms = per_frame_ms(effect.update, strip, args.repeat)
+            per_pixel_ms = per_frame_ms(effect.update, per_pixel_strip, args.repeat)
+            print('%-8s %8d %14.3f %14.3f %14.3f %9.1fx %9.1fx' % (
+                name, led_count, legacy_ms, frame_ms, per_pixel_ms, legacy_ms / frame_ms, legacy_ms / per_pixel_ms))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Frame buffer benchmark.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='LED counts to measure')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions, best is reported')
+    main(parser.parse_args())
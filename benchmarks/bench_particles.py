@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Frame cost of Fireworks with a particle pool pre-filled to a given number
+# of live particles.
+
+import argparse
+import timeit
+
+import headless
+
+headless.install()
+
+from fireworks import Fireworks  # noqa: E402
+from particles import ParticlePool  # noqa: E402
+
+COUNTS = [100, 1000, 10000]
+
+
+def main(args):
+    strip = headless.FakeLedStrip(led_count=args.led_count)
+    print('%10s %10s' % ('particles', 'frame ms'))
+    for count in args.counts:
+        fireworks = Fireworks(strip, seed=0)
+        fireworks.particles = ParticlePool(count, damping=1.0)
+
+        def frame():
+            # keep the pool full so every frame handles `count` particles
+            pool = fireworks.particles
+            pool.spawn(
+                pos=fireworks.rng.uniform(0, strip.led_count, count - pool.count),
+                speed=0.0, hue=0.5, brightness=1.0, decay=1.0
+            )
+            fireworks.update(strip)
+
+        number = 50
+        best = min(timeit.repeat(frame, number=number, repeat=args.repeat))
+        print('%10d %10.3f' % (count, best / number * 1000))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Particle pool benchmark.')
+    parser.add_argument('--led-count', type=int, default=300, help='Strip length')
+    parser.add_argument('--counts', type=int, nargs='+', default=COUNTS, help='Live particle counts')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions, best is reported')
+    main(parser.parse_args())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Frame rate of sharded.py with one worker process per segment against
+# rendering the same segments one after another in a single process. The
+# workers are forked, so they share the fake pyledstrip installed here.
+
+import argparse
+import multiprocessing
+import os
+import time
+
+import headless
+
+headless.install()
+
+from compositor import Layer, load_effect  # noqa: E402
+from framebuffer import FrameBuffer  # noqa: E402
+from sharded import Shard, ShardedRenderer  # noqa: E402
+
+SHARDS = [1, 2, 4, 8]
+
+
+def serial_fps(strip, shards, frames):
+    layers = []
+    for shard in shards:
+        layer = Layer(shard.stop - shard.start)
+        load_effect(layer, shard.effect)
+        layers.append((shard, layer))
+    frame = FrameBuffer(strip.led_count)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        for shard, layer in layers:
+            layer.render()
+            frame.pixels[shard.start:shard.stop] = layer.pixels
+        frame.show(strip)
+    return frames / (time.perf_counter() - start)
+
+
+def sharded_fps(strip, shards, frames):
+    with ShardedRenderer(shards, multiprocessing.get_context('fork')) as renderer:
+        renderer.update()  # workers are up
+        start = time.perf_counter()
+        for _ in range(frames):
+            renderer.update()
+        return frames / (time.perf_counter() - start)
+
+
+def main(args):
+    print('%d cores' % os.cpu_count())
+    print('%7s %8s %12s %12s %8s' % ('shards', 'leds', 'serial fps', 'sharded fps', 'speedup'))
+    for count in args.shards:
+        strip = headless.FakeLedStrip(led_count=count * args.leds)
+        shards = [Shard(strip, args.effect, i * args.leds, (i + 1) * args.leds) for i in range(count)]
+        serial = serial_fps(strip, shards, args.frames)
+        sharded = sharded_fps(strip, shards, args.frames)
+        print('%7d %8d %12.1f %12.1f %7.2fx' % (count, count * args.leds, serial, sharded, sharded / serial))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sharded rendering benchmark.')
+    parser.add_argument('--shards', type=int, nargs='+', default=SHARDS, help='Worker counts')
+    parser.add_argument('--leds', type=int, default=3000, help='LEDs per shard')
+    parser.add_argument('--effect', default='sines', help='Effect rendered on every shard')
+    parser.add_argument('--frames', type=int, default=100, help='Frames to time')
+    main(parser.parse_args())
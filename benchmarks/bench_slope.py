@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Cost of finding the downhill acceleration for a number of particles: the
+# original per-tick LED lookup with np.arctan2 and math.sin against the
+# precomputed Heightmap slope table, scalar and as one vectorized gather.
+
+import argparse
+import math
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'experiments', 'physics'))
+
+from heightmap import Heightmap  # noqa: E402
+
+COUNTS = [10, 100, 1000]
+
+
+class Led:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def get_xy(self):
+        return self.x, self.y
+
+
+def per_tick(leds, positions):
+    for pos in positions:
+        sp_old = leds[math.floor(pos) + 0].get_xy()
+        sp_new = leds[math.floor(pos) + 1].get_xy()
+        ang = np.arctan2(sp_new[1] - sp_old[1], sp_new[0] - sp_old[0])
+        9.81 * math.sin(ang)
+
+
+def table(heightmap, positions):
+    for pos in positions:
+        9.81 * heightmap.slope(pos)
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    xs = np.arange(args.led_count) / 60
+    ys = np.cumsum(rng.normal(0, 0.005, args.led_count))
+    leds = {i: Led(x, y) for i, (x, y) in enumerate(zip(xs, ys))}
+    heightmap = Heightmap(np.vstack((np.arange(args.led_count), xs, ys)))
+
+    print('%10s %12s %12s %12s' % ('particles', 'lookup us', 'table us', 'gather us'))
+    for count in args.counts:
+        positions = rng.uniform(0, args.led_count - 1, count)
+        position_list = positions.tolist()
+        number = max(1, 10000 // count)
+        results = [
+            min(timeit.repeat(func, number=number, repeat=args.repeat)) / number * 1e6
+            for func in (
+                lambda: per_tick(leds, position_list),
+                lambda: table(heightmap, position_list),
+                lambda: heightmap.acceleration(positions, 1.0),
+            )
+        ]
+        print('%10d %12.1f %12.1f %12.1f' % (count, *results))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Slope lookup benchmark.')
+    parser.add_argument('--led-count', type=int, default=300, help='LEDs in the synthetic world')
+    parser.add_argument('--counts', type=int, nargs='+', default=COUNTS, help='Particle counts')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions, best is reported')
+    main(parser.parse_args())
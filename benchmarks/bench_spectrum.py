@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Per-block cost of the FFT band analysis for several hop sizes, next to the
+# real time each hop covers at the capture rate.
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'experiments', 'sound'))
+
+from spectrum import BandAnalyzer  # noqa: E402
+from vu_constants import RATE  # noqa: E402
+
+CHANNELS = 2
+HOPS = [128, 256, 512, 1024]
+
+
+def main(args):
+    analyzer = BandAnalyzer(bands=args.bands, size=args.size, channels=CHANNELS)
+    rng = np.random.default_rng(0)
+
+    print('%8s %12s %12s %10s' % ('hop', 'us / block', 'hop us', 'load'))
+    for hop in args.hops:
+        block = rng.integers(-32768, 32768, hop * CHANNELS, dtype=np.int16).tobytes()
+        number = 2000
+        best = min(timeit.repeat(lambda: analyzer.analyze(block), number=number, repeat=args.repeat))
+        cost = best / number * 1e6
+        budget = hop / RATE * 1e6
+        print('%8d %12.1f %12.1f %9.1f%%' % (hop, cost, budget, cost / budget * 100))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='FFT band analyzer benchmark.')
+    parser.add_argument('--size', type=int, default=2048, help='FFT size')
+    parser.add_argument('--bands', type=int, default=16, help='Number of bands')
+    parser.add_argument('--hops', type=int, nargs='+', default=HOPS, help='Hop sizes in frames')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions, best is reported')
+    main(parser.parse_args())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Tick cost of the batched gradient physics (experiments/physics/swarm.py)
+# against the original one-object-per-particle simulation, which is kept
+# here as a reference. Both are run from the same seed and time step and
+# must end in the same state before the timings are reported.
+
+import argparse
+import collections
+import os
+import random
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'experiments', 'physics'))
+
+from heightmap import Heightmap  # noqa: E402
+from swarm import DEFAULT_TTL, Swarm  # noqa: E402
+
+COUNTS = [100, 1000, 5000]
+DT = 0.01
+
+
+class Particle:
+    def __init__(self, pos, v, hue, mass, ttl):
+        self.pos = pos
+        self.v = v
+        self.hue = hue
+        self.mass = mass
+        self.ttl = DEFAULT_TTL
+        self.ttl2 = ttl
+        self.hist = collections.deque(maxlen=30)
+
+    def tick(self, t, heightmap):
+        if self.pos < 0:
+            self.pos = 298
+        if self.pos >= 299:
+            self.pos = 1
+        g = 9.81 * self.mass
+        a_clean = g * heightmap.slope(self.pos)
+        a_resistance = 0.6 / 1 * self.v
+        a_final = a_clean - a_resistance
+        self.v += a_final * t
+        self.pos += self.v * t * 20
+        if abs(self.v) < 0.2:
+            self.ttl = self.ttl - t
+        else:
+            self.ttl = DEFAULT_TTL
+        self.hist.append(self.pos)
+        self.ttl2 -= t
+
+    def is_alive(self, led_count):
+        return led_count >= self.pos >= 0 and self.ttl >= 0 and self.ttl2 > 0
+
+
+def spawn_args(count, seed):
+    rng = random.Random(seed)
+    return [(rng.uniform(10, 290), rng.uniform(-3, 3), rng.random(), rng.choice([-0.1, 0.5, 1.0]), rng.uniform(1, 80))
+            for _ in range(count)]
+
+
+def make_objects(args):
+    return [Particle(*a) for a in args]
+
+
+def make_swarm(args):
+    swarm = Swarm()
+    pos, v, hue, mass, ttl = map(np.array, zip(*args))
+    swarm.spawn(pos, v, hue, mass, 1.0, ttl)
+    return swarm
+
+
+def tick_objects(particles, heightmap, led_count):
+    particles = sorted(particles, key=lambda p: p.pos)
+    next_generation = []
+    for particle in particles:
+        particle.tick(DT, heightmap)
+        if particle.is_alive(led_count):
+            next_generation.append(particle)
+    return next_generation
+
+
+def tick_swarm(swarm, heightmap, led_count):
+    swarm.tick(DT, heightmap)
+    swarm.compact(swarm.alive(led_count))
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    led_count = 300
+    ids = np.arange(led_count)
+    heightmap = Heightmap(np.vstack((ids, ids / 60, np.cumsum(rng.normal(0, 0.005, led_count)))))
+
+    # same state after a few hundred ticks
+    start = spawn_args(200, args.seed)
+    particles = make_objects(start)
+    swarm = make_swarm(start)
+    for _ in range(300):
+        particles = tick_objects(particles, heightmap, led_count)
+        tick_swarm(swarm, heightmap, led_count)
+    expected = sorted((p.pos, p.v, p.ttl, p.ttl2, list(p.hist)) for p in particles)
+    n = swarm.count
+    length = np.minimum(swarm.ticks[:n], 30)
+    actual = sorted(
+        (swarm.pos[i], swarm.v[i], swarm.ttl[i], swarm.ttl2[i],
+         [swarm.hist[i, (swarm.head - length[i] + k) % 30] for k in range(length[i])])
+        for i in range(n)
+    )
+    assert expected == actual, 'batched physics diverged from the reference'
+    print('identical state after 300 ticks (%d particles alive)' % n)
+
+    print('%10s %14s %14s' % ('particles', 'objects us', 'swarm us'))
+    for count in args.counts:
+        start = spawn_args(count, args.seed)
+        # long lived so the population stays constant while timing
+        start = [(pos, v, hue, mass, 1e9) for pos, v, hue, mass, ttl in start]
+        timings = []
+        for make, tick in ((make_objects, tick_objects), (make_swarm, tick_swarm)):
+            state = [make(start)]
+
+            def step():
+                result = tick(state[0], heightmap, led_count)
+                if result is not None:
+                    state[0] = result
+
+            number = 20
+            timings.append(min(timeit.repeat(step, number=number, repeat=args.repeat)) / number * 1e6)
+        print('%10d %14.1f %14.1f' % (count, *timings))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gradient physics benchmark.')
+    parser.add_argument('--counts', type=int, nargs='+', default=COUNTS, help='Particle counts')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the particle setup')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions, best is reported')
+    main(parser.parse_args())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Hardware-free stand-ins so effects can be imported and driven from the
+# benchmarks. FakeLedStrip keeps its pixels in memory and mirrors the
+# pyledstrip drawing calls the effects use; install() registers it as the
+# pyledstrip module when the real library is not available.
+#
+# FakeLedStrip also takes a whole frame through set_pixels(), which the real
+# LedStrip does not have. With bulk=False it leaves that out, so a frame
+# buffer has to push every LED through set_pixel_rgb() like on hardware.
+
+import colorsys
+import math
+import os
+import sys
+import types
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+
+class FakeLedStrip:
+    def __init__(self, args=None, led_count=300, loop=False, flip=False, bulk=True):
+        if args is not None and getattr(args, 'led_count', None):
+            led_count = args.led_count
+        self.led_count = led_count
+        self.loop = loop
+        self.flip = flip
+        self.pixels = np.zeros((led_count, 3), dtype=np.float32)
+        self.transmits = 0
+        if not bulk:
+            # blit() looks for set_pixels and falls back to set_pixel_rgb
+            self.set_pixels = None
+
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument('--led-count', type=int, default=300, help='Number of LEDs')
+
+    def _index(self, pos):
+        if self.loop:
+            return pos % self.led_count
+        if 0 <= pos < self.led_count:
+            return pos
+        return None
+
+    def set_pixel_rgb(self, pos, red, green, blue):
+        pos = self._index(int(pos))
+        if pos is not None:
+            self.pixels[pos] = (red, green, blue)
+
+    def add_pixel_rgb(self, pos, red, green, blue):
+        pos = self._index(int(pos))
+        if pos is not None:
+            self.pixels[pos] += (red, green, blue)
+
+    def set_rgb(self, pos, red, green, blue):
+        whole = math.floor(pos)
+        frac = pos - whole
+        if not frac:
+            self.set_pixel_rgb(whole, red, green, blue)
+            return
+        self.set_pixel_rgb(whole, red * (1 - frac), green * (1 - frac), blue * (1 - frac))
+        self.set_pixel_rgb(whole + 1, red * frac, green * frac, blue * frac)
+
+    def add_rgb(self, pos, red, green, blue):
+        whole = math.floor(pos)
+        frac = pos - whole
+        self.add_pixel_rgb(whole, red * (1 - frac), green * (1 - frac), blue * (1 - frac))
+        if frac:
+            self.add_pixel_rgb(whole + 1, red * frac, green * frac, blue * frac)
+
+    def set_hsv(self, pos, hue, sat, val):
+        self.set_rgb(pos, *colorsys.hsv_to_rgb(hue, sat, val))
+
+    def add_hsv(self, pos, hue, sat, val):
+        self.add_rgb(pos, *colorsys.hsv_to_rgb(hue, sat, val))
+
+    def set_pixels(self, pixels):
+        self.pixels[:] = pixels
+
+    def clear(self):
+        self.pixels.fill(0.0)
+
+    def off(self):
+        self.clear()
+        self.transmit()
+
+    def transmit(self):
+        self.transmits += 1
+
+
+def install():
+    """Make the effect modules importable without hardware libraries."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    try:
+        import pyledstrip  # noqa: F401
+    except ImportError:
+        module = types.ModuleType('pyledstrip')
+        module.LedStrip = FakeLedStrip
+        sys.modules['pyledstrip'] = module
+
+
+
+class RecordingStrip(FakeLedStrip):
+    """FakeLedStrip that keeps a copy of every transmitted frame, up to
+    max_frames of them."""
+
+    def __init__(self, args=None, led_count=300, loop=False, flip=False, bulk=True, max_frames=None):
+        super().__init__(args=args, led_count=led_count, loop=loop, flip=flip, bulk=bulk)
+        self.max_frames = max_frames
+        self.frames = []
+
+    def transmit(self):
+        super().transmit()
+        if self.max_frames is None or len(self.frames) < self.max_frames:
+            self.frames.append(self.pixels.copy())
+
+
+class VirtualClock:
+    """Stands in for the time module inside effect modules. Time only moves
+    when the driver advances it or an effect sleeps."""
+
+    def __init__(self, start=1e9):
+        self.now = start
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+    perf_counter = time
+
+    def sleep(self, seconds):
+        self.now += seconds
@@ -5,8 +5,12 @@ import argparse
 import math
 import time
 
-from periodicx import periodicx
+import numpy as np
+
+from framebuffer import FrameBuffer
 from pyledstrip import LedStrip
+from scheduler import periodic
+from splat import NEAREST
 
 
 class Boomerang:
@@ -22,42 +26,41 @@ class Boomerang:
         self.green = green
         self.blue = blue
 
-    def update(self, strip):
-        t = time.time()
-        p = int(strip.led_count * (self.c1 + 0.5 + self.a1 * 0.5 * math.sin((t * self.f1 + self.p1) * 2 * math.pi)))
-        s = int(self.a2 * strip.led_count * math.sin((t * self.f2 + self.p2) * 2 * math.pi))
-        p1 = min(p - s, p + s)
-        p2 = max(p - s, p + s)
-
-        # Boomerang
-        for i in range(p1, p2 + 1):
-            strip.add_pixel_rgb(i, self.red, self.green, self.blue)
-
-        # End points
-        strip.add_pixel_rgb(p1 - 1, 1, 1, 0)
-        strip.add_pixel_rgb(p2 + 1, 1, 1, 0)
-
 
 class Boomerangs:
     PERIOD = 1 / 60
 
-    def __init__(self):
+    def __init__(self, strip):
+        self.frame = FrameBuffer(strip.led_count)
         self.boomerangs = [
             Boomerang(0.7, 0.3, 0.1, 0, 0.1, 0.9, 0.2, 1, 0, 0),
             Boomerang(0.6, 0.33, 0.4, 0.1, 0.11, 0.91, 0.31, 0, 1, 0),
             Boomerang(0.8, 0.21, 0.6, -0.05, 0.06, 0.82, 0.78, 0, 0, 1),
         ]
+        # all boomerangs are evaluated together, one array per parameter
+        for name in ('a1', 'f1', 'p1', 'c1', 'a2', 'f2', 'p2'):
+            setattr(self, name, np.array([getattr(b, name) for b in self.boomerangs]))
+        self.colors = np.array([(b.red, b.green, b.blue) for b in self.boomerangs], dtype=np.float32)
 
     def update(self, strip):
-        strip.clear()
-        for boomerang in self.boomerangs:
-            boomerang.update(strip)
-        strip.transmit()
+        t = time.time()
+        led_count = strip.led_count
+        p = np.trunc(led_count * (self.c1 + 0.5 + self.a1 * 0.5 * np.sin((t * self.f1 + self.p1) * 2 * math.pi)))
+        s = np.trunc(self.a2 * led_count * np.sin((t * self.f2 + self.p2) * 2 * math.pi))
+        p1 = np.minimum(p - s, p + s).astype(np.intp)
+        p2 = np.maximum(p - s, p + s).astype(np.intp)
+
+        self.frame.clear()
+        # Boomerang
+        self.frame.add_spans(p1, p2 + 1, self.colors)
+        # End points
+        self.frame.add_rgb(np.concatenate((p1 - 1, p2 + 1)), (1, 1, 0), kernel=NEAREST)
+        self.frame.show(strip)
 
 
 def main(args):
     strip = LedStrip(args=args)
-    periodicx(Boomerangs().update, Boomerangs.PERIOD, strip)
+    periodic(Boomerangs(strip).update, Boomerangs.PERIOD, strip)
 
 
 if __name__ == '__main__':
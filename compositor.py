@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Layer compositor. Runs several effects at once, each drawing into its own
+# preallocated layer instead of the strip, blends the layers bottom to top
+# and transmits once per frame. A layer looks like a strip to its effect,
+# so effects drawing through FrameBuffer or blit() work unchanged.
+#
+# Blend modes, with o the layer opacity:
+#   ADD       frame + o * layer
+#   ALPHA     layer over frame, the brightest channel of a pixel is its
+#             coverage, black is transparent
+#   MAX       max(frame, o * layer)
+#   MULTIPLY  frame * (1 - o + o * layer)
+#
+# Disabled layers and layers at opacity 0 are neither rendered nor blended.
+# Every effect renders at its own PERIOD while the compositor transmits at
+# the fastest one. An effect returning a delay from its update (see
+# scheduler.py) is not rendered again until then. In between, a layer's
+# last frame keeps being blended.
+
+import argparse
+import importlib
+import inspect
+import time
+
+import numpy as np
+
+from framebuffer import FrameBuffer
+from pyledstrip import LedStrip
+from scheduler import periodic
+
+ADD = 'add'
+ALPHA = 'alpha'
+MAX = 'max'
+MULTIPLY = 'multiply'
+BLEND_MODES = (ADD, ALPHA, MAX, MULTIPLY)
+DEFAULT_PERIOD = 1 / 60
+
+
+class Layer:
+    def __init__(self, led_count, blend=ADD, opacity=1.0, clock=time.monotonic):
+        if blend not in BLEND_MODES:
+            raise ValueError('unknown blend mode %r' % (blend,))
+        self.led_count = led_count
+        self.blend = blend
+        self.opacity = opacity
+        self.enabled = True
+        self.pixels = np.zeros((led_count, 3), dtype=np.float32)
+        self.clock = clock
+        self._func = None
+        self._args = ()
+        self._period = None
+        self._due = None
+        self._early = 0.0
+
+    def attach(self, func, *args, period=None):
+        """Render the layer by calling func(*args), once every period seconds
+        or on every frame without one."""
+        self._func = func
+        self._args = args
+        self._period = period
+        self._due = None
+
+    @property
+    def visible(self):
+        return self.enabled and self.opacity > 0 and self._func is not None
+
+    def render(self):
+        """Run the effect when it is due, returns the seconds until it is due
+        again or None."""
+        now = self.clock()
+        if self._due is not None and now < self._due - self._early:
+            return self._due - self._early - now
+        delay = self._func(*self._args)
+        if isinstance(delay, (int, float)):
+            self._due = now + delay
+            self._early = 0.0
+            return delay
+        if self._period is None:
+            self._due = None
+            return None
+        # step from the last deadline so the effect keeps its rate on average,
+        # after falling behind by more than a period it skips ahead. Frames
+        # rarely land exactly on the deadline, the one closest to it renders
+        due = now if self._due is None else self._due
+        self._due = due + self._period
+        if self._due <= now:
+            self._due = now + self._period
+        self._early = self._period / 2
+        return self._due - self._early - now
+
+    # the part of the LedStrip interface effects draw through
+
+    def set_pixels(self, pixels):
+        np.copyto(self.pixels, pixels)
+
+    def set_pixel_rgb(self, pos, red, green, blue):
+        self.pixels[pos] = (red, green, blue)
+
+    def add_pixel_rgb(self, pos, red, green, blue):
+        self.pixels[pos] += (red, green, blue)
+
+    def clear(self):
+        self.pixels.fill(0.0)
+
+    def transmit(self):
+        pass  # the compositor transmits
+
+
+class Compositor:
+    def __init__(self, strip, clock=time.monotonic):
+        self.strip = strip
+        self.clock = clock
+        self.frame = FrameBuffer(strip.led_count)
+        self.layers = []
+        self._scratch = np.empty((strip.led_count, 3), dtype=np.float32)
+
+    def add_layer(self, blend=ADD, opacity=1.0):
+        """New topmost layer, pass it to the effect in place of the strip."""
+        layer = Layer(self.strip.led_count, blend, opacity, self.clock)
+        self.layers.append(layer)
+        return layer
+
+    def blend(self, layer):
+        pixels = self.frame.pixels
+        scratch = self._scratch
+        o = np.float32(layer.opacity)
+        if layer.blend == ADD:
+            if o == 1:
+                pixels += layer.pixels
+            else:
+                np.multiply(layer.pixels, o, out=scratch)
+                pixels += scratch
+        elif layer.blend == MAX:
+            np.multiply(layer.pixels, o, out=scratch)
+            np.maximum(pixels, scratch, out=pixels)
+        elif layer.blend == MULTIPLY:
+            np.multiply(layer.pixels, o, out=scratch)
+            scratch += 1 - o
+            pixels *= scratch
+        else:
+            # premultiplied over, coverage is the brightest channel
+            coverage = np.clip(layer.pixels.max(axis=1, keepdims=True), 0.0, 1.0)
+            pixels *= 1 - o * coverage
+            np.multiply(layer.pixels, o, out=scratch)
+            pixels += scratch
+
+    def update(self):
+        """Render and blend every visible layer and transmit the result.
+        Returns the delay until the next layer wants to render if all of them
+        declared one, so the scheduler can sleep until then."""
+        self.frame.clear()
+        delays = []
+        for layer in self.layers:
+            if not layer.visible:
+                continue
+            delays.append(layer.render())
+            self.blend(layer)
+        self.frame.show(self.strip)
+        if delays and None not in delays:
+            return min(delays)
+        return None
+
+
+def takes_arguments(func):
+    return len(inspect.signature(func).parameters) > 0
+
+
+def class_name(module):
+    """'static_pattern' -> 'StaticPattern'"""
+    return ''.join(part[:1].upper() + part[1:] for part in module.split('_'))
+
+
+def create_effect(strip, name):
+    """Create the effect 'module' (class of the same name in CamelCase) or
+    'module.Class' on a strip. Returns the effect class and the function and
+    arguments that render a frame."""
+    module, _, cls = name.partition('.')
+    cls = cls or class_name(module)
+    try:
+        cls = getattr(importlib.import_module(module), cls)
+    except AttributeError:
+        raise ValueError("%s has no effect class %s, name it as 'module.Class'" % (module, cls)) from None
+    effect = cls(strip) if takes_arguments(cls) else cls()
+    # some effects draw onto the strip they were created with
+    if takes_arguments(effect.update):
+        return cls, effect.update, (strip,)
+    return cls, effect.update, ()
+
+
+def load_effect(layer, name):
+    """Create an effect on a layer and attach it at the effect's PERIOD.
+    Returns the effect class."""
+    cls, func, args = create_effect(layer, name)
+    layer.attach(func, *args, period=getattr(cls, 'PERIOD', None))
+    return cls
+
+
+def parse_layer(spec):
+    """'effect[:blend[:opacity]]' -> (effect, blend, opacity)"""
+    name, _, rest = spec.partition(':')
+    blend, _, opacity = rest.partition(':')
+    return name, blend or ADD, float(opacity) if opacity else 1.0
+
+
+def main(args):
+    strip = LedStrip(args=args, loop=True)
+    compositor = Compositor(strip)
+    periods = []
+    for spec in args.layers:
+        name, blend, opacity = parse_layer(spec)
+        cls = load_effect(compositor.add_layer(blend, opacity), name)
+        periods.append(getattr(cls, 'PERIOD', DEFAULT_PERIOD))
+    # the layers keep their own rates, transmit as often as the fastest
+    periodic(compositor.update, min(periods))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run several effects as layers of one strip.')
+    LedStrip.add_arguments(parser)
+    parser.add_argument('layers', nargs='+', metavar='EFFECT[:BLEND[:OPACITY]]',
+                        help='Effects bottom to top, e.g. sines fireworks:max:0.8. '
+                             'BLEND is one of %s' % ', '.join(BLEND_MODES))
+    main(parser.parse_args())
@@ -2,33 +2,37 @@
 # coding: utf-8
 
 import argparse
-import random
 
-from periodicx import periodicx
+import numpy as np
+
+from framebuffer import FrameBuffer, hue_to_rgb
 from pyledstrip import LedStrip
+from scheduler import periodic
 
 
 class Disco:
     PERIOD = 0.05
     count = 100
-    _last_on = False
+
+    def __init__(self, strip, seed=None):
+        self.frame = FrameBuffer(strip.led_count)
+        self.rng = np.random.default_rng(seed)
+        self._last_on = False
 
     def update(self, strip):
+        self.frame.clear()
         if self._last_on:
-            strip.clear()
-            hue = random.uniform(0.0, 1.0)
-            for i in range(self.count):
-                strip.set_hsv(int(random.random() * strip.led_count), hue, 1.0, 1.0)
-            strip.transmit()
-        else:
-            strip.off()
+            hue = self.rng.uniform(0.0, 1.0)
+            leds = (self.rng.random(self.count) * strip.led_count).astype(np.intp)
+            self.frame.pixels[leds] = hue_to_rgb(np.array([hue]))
+        self.frame.show(strip)
 
         self._last_on = not self._last_on
 
 
 def main(args):
     strip = LedStrip(args=args)
-    periodicx(Disco().update, Disco.PERIOD, strip)
+    periodic(Disco(strip).update, Disco.PERIOD, strip)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Pooled entities for launcher/rocket/debris worlds. Every kind of entity is
+# a Pool of parallel arrays, one per field, with an alive flag per slot.
+# Entities are updated in place through array operations, dead slots go on a
+# free list and are handed out again by the next spawn, and a pool only
+# grows (by doubling) when it runs out of free slots, so memory stays flat
+# at the high-water mark.
+#
+# Spawns requested while a tick is in progress are queued on the Entities
+# manager and created together by flush(), so entities spawned in a tick
+# are not moved until the next one.
+
+import collections
+
+import numpy as np
+
+DEFAULT_CAPACITY = 64
+
+
+class Pool:
+    def __init__(self, capacity=DEFAULT_CAPACITY, **fields):
+        """fields maps field names to dtypes, each becomes an array attribute."""
+        self.fields = fields
+        self.alive = np.zeros(capacity, dtype=bool)
+        for name, dtype in fields.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        # free slots, lowest last so they are handed out first
+        self._free = list(range(capacity - 1, -1, -1))
+        self._live = None
+
+    def __len__(self):
+        return len(self.alive) - len(self._free)
+
+    @property
+    def capacity(self):
+        return len(self.alive)
+
+    @property
+    def live(self):
+        """Slot indices of the living entities, in slot order."""
+        if self._live is None:
+            self._live = np.flatnonzero(self.alive)
+        return self._live
+
+    def _grow(self, needed):
+        old = self.capacity
+        capacity = old
+        while capacity - len(self) < needed:
+            capacity *= 2
+        self.alive = np.concatenate((self.alive, np.zeros(capacity - old, dtype=bool)))
+        for name, dtype in self.fields.items():
+            setattr(self, name, np.concatenate((getattr(self, name), np.zeros(capacity - old, dtype=dtype))))
+        self._free[:0] = range(capacity - 1, old - 1, -1)
+
+    def spawn(self, **values):
+        """Create entities from field arrays or scalars broadcast to the
+        longest one, fields not given start at zero. Returns their slots."""
+        arrays = np.broadcast_arrays(*values.values())
+        count = arrays[0].size if arrays else 0
+        if count == 0:
+            return np.zeros(0, dtype=np.intp)
+        if count > len(self._free):
+            self._grow(count)
+
+        slots = np.array(self._free[-count:][::-1], dtype=np.intp)
+        del self._free[-count:]
+        for name in self.fields:
+            getattr(self, name)[slots] = 0
+        for name, array in zip(values, arrays):
+            getattr(self, name)[slots] = array.ravel()
+        self.alive[slots] = True
+        self._live = None
+        return slots
+
+    def kill(self, slots):
+        """Free the given slots, an index array or a mask over live."""
+        slots = np.asarray(slots)
+        if slots.dtype == bool:
+            slots = self.live[slots]
+        if len(slots) == 0:
+            return
+        self.alive[slots] = False
+        self._free.extend(slots[::-1].tolist())
+        self._live = None
+
+
+class Entities:
+    def __init__(self):
+        self.pools = {}
+        self._pending = collections.defaultdict(list)
+
+    def pool(self, kind, capacity=DEFAULT_CAPACITY, **fields):
+        pool = self.pools[kind] = Pool(capacity, **fields)
+        return pool
+
+    def __getitem__(self, kind):
+        return self.pools[kind]
+
+    def request(self, kind, **values):
+        """Queue a batch of spawns, created by the next flush()."""
+        if np.broadcast(*values.values()).size:
+            self._pending[kind].append(values)
+
+    def flush(self):
+        for kind, batches in self._pending.items():
+            if len(batches) == 1:
+                self.pools[kind].spawn(**batches[0])
+            elif batches:
+                columns = {name: [] for name in batches[0]}
+                for batch in batches:
+                    shape = np.broadcast(*batch.values()).shape
+                    for name, value in batch.items():
+                        columns[name].append(np.broadcast_to(value, shape).ravel())
+                self.pools[kind].spawn(**{name: np.concatenate(arrays) for name, arrays in columns.items()})
+            batches.clear()
+
+    def __len__(self):
+        return sum(len(pool) for pool in self.pools.values())
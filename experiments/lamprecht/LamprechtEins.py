@@ -2,25 +2,27 @@
 # coding: utf-8
 
 import argparse
+import os
+import sys
 
-from periodicx import periodicx
-from pyledstrip import LedStrip
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+
+from framebuffer import FrameBuffer  # noqa: E402
+from pyledstrip import LedStrip  # noqa: E402
+from scheduler import periodic  # noqa: E402
 
 
 class Beschleuniger:
 
     def __init__(self, startposition, geschwindigkeit, r, g, b):
-        self.pos = 0
         self.startposition = startposition
         self.geschwindigkeit = geschwindigkeit
         self.r = r
         self.g = g
         self.b = b
 
-    def malen(self, strip: LedStrip):
-        strip.add_rgb((self.pos + self.startposition) * self.geschwindigkeit, self.r, self.g, self.b)
-        self.pos = self.pos + 1
-
 
 class Disco:
     PERIOD = 0.05
@@ -46,18 +48,25 @@ class Disco:
                           Beschleuniger(150, 2, 0.5, 0.5, 0.0),
                           Beschleuniger(150, 2.5, 0.0, 0.5, 0.5)]
 
-    def update(self, strip: LedStrip):
-        strip.clear()
-
-        for einBeschleuniger in self.meineBeschleuniger:
-            einBeschleuniger.malen(strip)
+    def __init__(self, strip: LedStrip):
+        # alle Beschleuniger auf einmal malen
+        self.frame = FrameBuffer(strip.led_count)
+        self.pos = 0
+        self.startpositionen = np.array([b.startposition for b in self.meineBeschleuniger], dtype=np.float64)
+        self.geschwindigkeiten = np.array([b.geschwindigkeit for b in self.meineBeschleuniger], dtype=np.float64)
+        self.farben = np.array([(b.r, b.g, b.b) for b in self.meineBeschleuniger], dtype=np.float32)
 
-        strip.transmit()
+    def update(self, strip: LedStrip):
+        self.frame.clear()
+        positionen = (self.pos + self.startpositionen) * self.geschwindigkeiten
+        self.frame.add_rgb(positionen, self.farben, loop=True)
+        self.pos = self.pos + 1
+        self.frame.show(strip)
 
 
 def main(args):
     strip = LedStrip(args=args, loop=True)
-    periodicx(Disco().update, Disco.PERIOD, strip)
+    periodic(Disco(strip).update, Disco.PERIOD, strip)
 
 
 if __name__ == '__main__':
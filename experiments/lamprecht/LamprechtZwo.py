@@ -2,133 +2,116 @@
 # coding: utf-8
 
 import argparse
-import random
+import os
+import sys
 
-from periodicx import periodicx
-from pyledstrip import LedStrip
+import numpy as np
 
-PERIOD = 0.05
-
-
-class Debris:
-    def __init__(self, pos, v, ch, cs, cv):
-        self.pos = pos
-        self.v = v
-        self.ch = ch
-        self.cs = cs
-        self.cv = cv
-        self.age = 0
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
 
-    def move(self, t):
-        self.age += t
-        self.cv *= 0.9
-        self.pos += self.v * t
-
-        if self.age > 3:
-            return []
-        else:
-            return [self]
-
-    def paint(self, strip: LedStrip):
-        strip.add_hsv(self.pos,
-                      0.66,  # self.ch,
-                      self.cs, self.cv)
-
-
-class Rocket:
-    def __init__(self, pos, v, ch, cs, cv):
-        self.pos = pos
-        self.v = v
-        self.ch = ch
-        self.cs = cs
-        self.cv = cv
-        self.age = 0
+from entities import Entities  # noqa: E402
+from framebuffer import FrameBuffer, hsv_to_rgb  # noqa: E402
+from pyledstrip import LedStrip  # noqa: E402
+from scheduler import periodic  # noqa: E402
 
-    def move(self, t):
-        self.age += t
-        self.pos += self.v * t
-
-        if self.age > 3:
-            debris = []
-            for i in range(3):
-                item = Debris(self.pos, 10 * random.uniform(-1, 1), random.uniform(0, 1), 1, 1)
-                debris.append(item)
-            return debris
-        else:
-            return [self]
-
-    def paint(self, strip: LedStrip):
-        strip.add_hsv(self.pos,
-                      0.33,  # self.ch,
-                      self.cs, self.cv)
-
-
-class Launcher:
-    def __init__(self, pos, ch, cs, cv):
-        self.pos = pos
-        self.ch = ch
-        self.cs = cs
-        self.cv = cv
-        self.age = 0
-        self.freq = 3 * random.uniform(0.5, 1)
+PERIOD = 0.05
 
-    def move(self, t):
-        self.age += t
-
-        if self.age > self.freq:
-            self.age -= self.freq
-            rocket = Rocket(
-                self.pos,
-                10 * random.uniform(0.5, 1),
-                random.uniform(0, 1),
-                1,
-                1
-            )
-            return [self, rocket]
-        else:
-            return [self]
-
-    def paint(self, strip: LedStrip):
-        strip.add_hsv(self.pos,
-                      0.00,  # self.ch,
-                      self.cs, self.cv)
+# Launcher: schiesst alle freq Sekunden eine Rakete ab
+# Rocket: fliegt 3 Sekunden und zerplatzt dann in 3 Debris
+# Debris: fliegt 3 Sekunden und verglimmt dabei
+LAUNCHER_HUE = 0.00
+ROCKET_HUE = 0.33
+DEBRIS_HUE = 0.66
+LIFETIME = 3
+DEBRIS_PER_ROCKET = 3
 
 
 class World:
 
-    def __init__(self, strip: LedStrip):
+    def __init__(self, strip: LedStrip, seed=None):
         worldsize = strip.led_count
+        self.rng = np.random.default_rng(seed)
+        self.frame = FrameBuffer(worldsize)
 
-        self.lauchners = []
-        for i in range(3):
-            self.lauchners.append(
-                Launcher(
-                    random.uniform(0, worldsize),
-                    0,
-                    1,
-                    1
-                )
-            )
-
-    def update(self, strip: LedStrip):
-        strip.clear()
-
-        newStuff = []
-        for rocket in self.lauchners:
-            results = rocket.move(PERIOD)  # tickrate is perfect
-            newStuff += results
+        self.entities = Entities()
+        self.launchers = self.entities.pool('launcher', pos=float, cs=float, cv=float, age=float, freq=float)
+        self.rockets = self.entities.pool('rocket', pos=float, v=float, ch=float, cs=float, cv=float, age=float)
+        self.debris = self.entities.pool('debris', pos=float, v=float, ch=float, cs=float, cv=float, age=float)
 
-        self.lauchners = newStuff
+        self.launchers.spawn(
+            pos=self.rng.uniform(0, worldsize, 3),
+            cs=1,
+            cv=1,
+            freq=3 * self.rng.uniform(0.5, 1, 3)
+        )
 
-        for rocket in self.lauchners:
-            rocket.paint(strip)
+    def move(self, t):
+        rng = self.rng
+
+        launchers = self.launchers
+        i = launchers.live
+        launchers.age[i] += t
+        fire = i[launchers.age[i] > launchers.freq[i]]
+        launchers.age[fire] -= launchers.freq[fire]
+        self.entities.request(
+            'rocket',
+            pos=launchers.pos[fire],
+            v=10 * rng.uniform(0.5, 1, len(fire)),
+            ch=rng.uniform(0, 1, len(fire)),
+            cs=1,
+            cv=1
+        )
+
+        rockets = self.rockets
+        i = rockets.live
+        rockets.age[i] += t
+        rockets.pos[i] += rockets.v[i] * t
+        burst = i[rockets.age[i] > LIFETIME]
+        count = len(burst) * DEBRIS_PER_ROCKET
+        self.entities.request(
+            'debris',
+            pos=np.repeat(rockets.pos[burst], DEBRIS_PER_ROCKET),
+            v=10 * rng.uniform(-1, 1, count),
+            ch=rng.uniform(0, 1, count),
+            cs=1,
+            cv=1
+        )
+        rockets.kill(burst)
+
+        debris = self.debris
+        i = debris.live
+        debris.age[i] += t
+        debris.cv[i] *= 0.9
+        debris.pos[i] += debris.v[i] * t
+        debris.kill(i[debris.age[i] > LIFETIME])
+
+        # new entities show up right away but move from the next tick on
+        self.entities.flush()
+
+    def paint(self):
+        pos = []
+        hue = []
+        sat = []
+        val = []
+        for pool, pool_hue in ((self.launchers, LAUNCHER_HUE), (self.rockets, ROCKET_HUE), (self.debris, DEBRIS_HUE)):
+            i = pool.live
+            pos.append(pool.pos[i])
+            hue.append(np.full(len(i), pool_hue))
+            sat.append(pool.cs[i])
+            val.append(pool.cv[i])
+        colors = hsv_to_rgb(np.concatenate(hue), np.concatenate(sat), np.concatenate(val))
+        self.frame.add_rgb(np.concatenate(pos), colors, loop=True)
 
-        strip.transmit()
+    def update(self, strip: LedStrip):
+        self.frame.clear()
+        self.move(PERIOD)  # tickrate is perfect
+        self.paint()
+        self.frame.show(strip)
 
 
 def main(args):
     strip = LedStrip(args=args, loop=True)
-    periodicx(World(strip).update, PERIOD, strip)
+    periodic(World(strip).update, PERIOD, strip)
 
 
 if __name__ == '__main__':
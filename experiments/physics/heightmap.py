@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# Array view of a LedWorld layout. Everything the physics needs per LED is
+# computed once when the world is loaded instead of on every tick. Derived
+# values are memoized until invalidate() is called after the coordinates
+# change, and load() keeps a binary copy of the arrays next to the JSON
+# file so later starts skip parsing it.
+
+import functools
+import hashlib
+import math
+
+import numpy as np
+
+GRAVITY = 9.81
+CACHE_SUFFIX = '.npz'
+
+
+class Heightmap:
+    def __init__(self, ixys):
+        """ixys: the (id, x, y, ...) rows of LedWorld.to_np(), one column per LED."""
+        self.ixys = np.asarray(ixys, dtype=np.float64)
+        self.invalidate()
+
+    @classmethod
+    def from_world(cls, world):
+        return cls(world.to_np())
+
+    @classmethod
+    def load(cls, path):
+        """Heightmap of a LedWorld JSON file. The arrays are cached in a
+        sidecar file keyed by the hash of the JSON, so the JSON is only parsed
+        again when it changes."""
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+
+        cache = path + CACHE_SUFFIX
+        try:
+            with np.load(cache) as data:
+                if str(data['sha1']) == digest:
+                    return cls(data['ixys'])
+        except (OSError, KeyError, ValueError):
+            pass  # no usable cache
+
+        from ledworld import LedWorld
+        heightmap = cls.from_world(LedWorld.from_json_file(path))
+        try:
+            with open(cache, 'wb') as f:
+                np.savez(f, sha1=digest, ixys=heightmap.ixys)
+        except OSError:
+            pass  # read-only location, parse again next time
+        return heightmap
+
+    def invalidate(self):
+        """Recompute everything derived from ixys, call after changing it."""
+        for name in ('y_min', 'y_max', 'normalized_y'):
+            self.__dict__.pop(name, None)
+
+        self.ids = self.ixys[0, :].astype(int)
+        size = self.ids.max() + 1 if len(self.ids) else 0
+        self.xs = np.zeros(size)
+        self.ys = np.zeros(size)
+        self.xs[self.ids] = self.ixys[1, :]
+        self.ys[self.ids] = self.ixys[2, :]
+
+        # sine of the inclination of the segment from LED i to LED i + 1,
+        # i.e. sin(arctan2(dy, dx)), the share of gravity along the strip.
+        # LEDs at the same spot make a flat segment, like arctan2(0, 0)
+        dx = np.diff(self.xs)
+        dy = np.diff(self.ys)
+        length = np.hypot(dx, dy)
+        self.slope_sin = np.divide(dy, length, out=np.zeros_like(dy), where=length > 0)
+        self._slope_sin = self.slope_sin.tolist()
+
+    def __len__(self):
+        return len(self.xs)
+
+    @functools.cached_property
+    def y_min(self):
+        return float(self.ixys[2, :].min())
+
+    @functools.cached_property
+    def y_max(self):
+        return float(self.ixys[2, :].max())
+
+    @functools.cached_property
+    def normalized_y(self):
+        """Height of every LED scaled to 0..1, indexed by LED id."""
+        return (self.ys - self.y_min) / (self.y_max - self.y_min)
+
+    def slope(self, pos: float):
+        """sin of the inclination under a single position."""
+        return self._slope_sin[math.floor(pos)]
+
+    def slopes(self, pos):
+        """sin of the inclination under an array of positions."""
+        return self.slope_sin[np.floor(pos).astype(np.intp)]
+
+    def acceleration(self, pos, mass):
+        """Downhill acceleration for arrays of positions and masses."""
+        return GRAVITY * mass * self.slopes(pos)
@@ -1,42 +1,50 @@
 #!/usr/bin/env python3
 import argparse
+import os
+import sys
 
-import numpy as np
-
+from heightmap import Heightmap
 from ledworld import LedWorld
-from pyledstrip import LedStrip
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+
+from framebuffer import FrameBuffer, hue_to_rgb  # noqa: E402
+from pyledstrip import LedStrip  # noqa: E402
+
+HEIGHTMAP = "data/heightmap.default.json"
 
 
 class Game:
-    def __init__(self, strip: LedStrip):
+    def __init__(self, strip: LedStrip, heightmap: Heightmap):
         self.strip = strip
+        self.frame = FrameBuffer(strip.led_count)
+        self.heightmap = heightmap
         self.things = []
         self.age = 0
 
     def loop(self):
-        self.strip.clear()
-
-        y_min = np.min(world.to_np()[2,:])
-        y_max = np.max(world.to_np()[2,:])
+        self.frame.clear()
 
-        for led in world.leds.values():
-            # print(led)
-            self.strip.set_hsv(led.id, (led.y - y_min) / (y_max - y_min), 1.0, 1.0)
+        ids = self.heightmap.ids
+        ids = ids[ids < self.strip.led_count]
+        self.frame.pixels[ids] = hue_to_rgb(self.heightmap.normalized_y[ids])
 
-        self.strip.transmit()
+        self.frame.show(self.strip)
 
 
 def main(args):
     strip = LedStrip(args=args)
-    global world
-    world = LedWorld.from_json_file("data/heightmap.default.json")
-    world.plot()
+    heightmap = Heightmap.load(HEIGHTMAP)
+    if not args.no_plot:
+        world = LedWorld.from_json_file(HEIGHTMAP)
+        world.plot()
 
-    game = Game(strip)
+    game = Game(strip, heightmap)
     game.loop()
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Gravity-based LED particle simulation')
     LedStrip.add_arguments(parser)
+    parser.add_argument('--no-plot', action='store_true', help='Skip plotting, the heightmap JSON is then only parsed when its cache is stale')
     main(parser.parse_args())
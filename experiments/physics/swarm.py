@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# Batched particle physics for the gradient simulation. All particles live in
+# parallel arrays and are advanced together: one semi-implicit Euler step,
+# one liveness mask and one compaction per tick, no per-particle objects.
+
+import numpy as np
+
+from heightmap import GRAVITY
+
+DEFAULT_TTL = 2
+HISTORY = 30
+AIR_RESISTANCE = 0.6
+SPEED_SCALE = 20
+
+
+class Swarm:
+    FIELDS = ('pos', 'v', 'hue', 'mass', 'radius', 'ttl', 'ttl2', 'hist', 'ticks')
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.pos = np.zeros(capacity)
+        self.v = np.zeros(capacity)
+        self.hue = np.zeros(capacity)
+        self.mass = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        # time spent slow, reset while moving
+        self.ttl = np.zeros(capacity)
+        # absolute lifetime
+        self.ttl2 = np.zeros(capacity)
+        # last HISTORY positions of every particle. All particles append on
+        # every tick, so one shared ring index serves all rows; a particle
+        # owns the newest min(ticks, HISTORY) columns before it.
+        self.hist = np.zeros((capacity, HISTORY))
+        self.ticks = np.zeros(capacity, dtype=np.int64)
+        self.head = 0
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, needed):
+        capacity = len(self.pos)
+        while capacity < needed:
+            capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, pos, v, hue, mass, radius, ttl=DEFAULT_TTL):
+        """Append particles, arguments are arrays or scalars broadcast to the
+        longest one. ttl is the absolute lifetime."""
+        pos, v, hue, mass, radius, ttl = np.broadcast_arrays(pos, v, hue, mass, radius, ttl)
+        n = pos.size
+        if self.count + n > len(self.pos):
+            self._grow(self.count + n)
+
+        new = slice(self.count, self.count + n)
+        self.pos[new] = pos.ravel()
+        self.v[new] = v.ravel()
+        self.hue[new] = hue.ravel()
+        self.mass[new] = mass.ravel()
+        self.radius[new] = radius.ravel()
+        self.ttl[new] = DEFAULT_TTL
+        self.ttl2[new] = ttl.ravel()
+        self.ticks[new] = 0
+        self.count += n
+
+    def tick(self, t, heightmap):
+        n = self.count
+        pos = self.pos[:n]
+        v = self.v[:n]
+
+        # TODO check this
+        pos[pos < 0] = 298
+        pos[pos >= 299] = 1
+
+        # inclined plane, slope of the segment under the particle
+        a_clean = GRAVITY * self.mass[:n] * heightmap.slopes(pos)
+
+        # self-invented friction
+        a_final = a_clean - AIR_RESISTANCE / 1 * v
+
+        # semi implicit euler
+        v += a_final * t
+        pos += v * t * SPEED_SCALE
+
+        ttl = self.ttl[:n]
+        slow = np.abs(v) < 0.2
+        ttl[slow] -= t
+        ttl[~slow] = DEFAULT_TTL
+        self.ttl2[:n] -= t
+
+        self.hist[:n, self.head] = pos
+        self.head = (self.head + 1) % HISTORY
+        self.ticks[:n] += 1
+
+    def alive(self, led_count):
+        n = self.count
+        pos = self.pos[:n]
+        return (pos <= led_count) & (pos >= 0) & (self.ttl[:n] >= 0) & (self.ttl2[:n] > 0)
+
+    def compact(self, alive):
+        """Keep the particles where alive is set, preserving their order."""
+        n = int(np.count_nonzero(alive))
+        if n == self.count:
+            return
+        for name in self.FIELDS:
+            array = getattr(self, name)
+            array[:n] = array[:self.count][alive]
+        self.count = n
+
+    def trail(self, every=5):
+        """Positions and brightness of every `every`th history entry, oldest
+        first, fading in towards the particle."""
+        n = self.count
+        length = np.minimum(self.ticks[:n], HISTORY)
+        positions = []
+        hues = []
+        brightness = []
+        for i in range(0, HISTORY, every):
+            has = np.flatnonzero(length > i)
+            column = (self.head - length[has] + i) % HISTORY
+            positions.append(self.hist[has, column])
+            hues.append(self.hue[has])
+            brightness.append(0.05 / length[has] * i)
+        return np.concatenate(positions), np.concatenate(hues), np.concatenate(brightness)
+
+    def describe(self):
+        for i in range(self.count):
+            yield "P: pos=%.2f v=%.2f h=%.2f" % (self.pos[i], self.v[i], self.hue[i])
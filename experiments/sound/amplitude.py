@@ -1,10 +1,15 @@
 ''' This module introduces the Amplitude class which collects methods for
 calculating, adding and displaying. '''
 
+import collections
 import math
-import struct
+
+import numpy as np
+
 from vu_constants import SHORT_NORMALIZE
 
+Levels = collections.namedtuple('Levels', ['rms', 'peak', 'channels'])
+
 class Amplitude(object):
     ''' an abstraction for Amplitudes (with an underlying float value)
     that packages a display function and many more '''
@@ -41,10 +46,26 @@ class Amplitude(object):
     @staticmethod
     def from_data(block):
         ''' generate an Amplitude object based on a block of audio input data '''
-        count = len(block) / 2
-        shorts = struct.unpack("%dh" % count, block)
-        sum_squares = sum(s**2 * SHORT_NORMALIZE**2 for s in shorts)
-        return Amplitude(math.sqrt(sum_squares / count))
+        samples = np.frombuffer(block, dtype=np.int16).astype(np.float32)
+        sum_squares = float(np.dot(samples, samples)) * SHORT_NORMALIZE**2
+        return Amplitude(math.sqrt(sum_squares / len(samples)))
+
+    @staticmethod
+    def levels_from_data(block, channels=2):
+        ''' overall RMS, peak and per channel RMS (as Amplitudes) of a block of
+        interleaved 16 bit audio input data, read in place from the buffer '''
+        samples = np.frombuffer(block, dtype=np.int16)
+        peak = max(int(samples.max()), -int(samples.min())) * SHORT_NORMALIZE
+
+        frames = samples.reshape(-1, channels).astype(np.float32)
+        mean_squares = np.einsum('ij,ij->j', frames, frames) / len(frames)
+        per_channel = np.sqrt(mean_squares) * SHORT_NORMALIZE
+        rms = math.sqrt(float(mean_squares.mean())) * SHORT_NORMALIZE
+        return Levels(
+            Amplitude(rms),
+            Amplitude(peak),
+            [Amplitude(float(level)) for level in per_channel]
+        )
 
     def display(self, mark, scale=50):
         ''' display an amplitude and another (marked) maximal Amplitude
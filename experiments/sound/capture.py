@@ -0,0 +1,94 @@
+''' This module introduces the AudioCapture class which records audio in
+PyAudio callback mode and publishes the analysis of the newest block for a
+renderer running on its own clock. '''
+
+import collections
+
+import pyaudio
+
+from amplitude import Amplitude
+from vu_constants import RATE, INPUT_FRAMES_PER_BLOCK
+
+CaptureStats = collections.namedtuple('CaptureStats', ['blocks', 'overflows', 'underflows', 'dropped', 'stale'])
+
+
+class AudioCapture(object):
+    ''' runs on PyAudio's callback thread: every input block is analyzed
+    right away and stored in a single latest-value slot. Replacing the slot
+    is one reference assignment, so neither side takes a lock and the
+    renderer never blocks on audio. '''
+
+    def __init__(self, analyze=Amplitude.from_data, channels=2, rate=RATE,
+                 frames_per_buffer=INPUT_FRAMES_PER_BLOCK, initial=None):
+        self.analyze = analyze
+        self.channels = channels
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        # (block number, analysis), written by the callback only
+        self._slot = (0, Amplitude() if initial is None else initial)
+        self._read = 0
+        self.blocks = 0
+        self.overflows = 0
+        self.underflows = 0
+        self.dropped = 0
+        self.stale = 0
+        self._audio = None
+        self._stream = None
+        # optionally called with every analysis, on the callback thread
+        self.listener = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        if status & pyaudio.paInputUnderflow:
+            self.underflows += 1
+        self.blocks += 1
+        value = self.analyze(in_data)
+        self._slot = (self.blocks, value)
+        if self.listener is not None:
+            self.listener(value)
+        return None, pyaudio.paContinue
+
+    def latest(self):
+        ''' the analysis of the newest block. Blocks that were replaced before
+        anyone read them count as dropped, reading the same block again as
+        stale. A runtime handing blocks to a listener reads each one at most
+        once, so there only dropped is counted. '''
+        number, value = self._slot
+        if number == self._read:
+            self.stale += 1
+        else:
+            self.dropped += max(number - self._read - 1, 0)
+            self._read = number
+        return value
+
+    @property
+    def stats(self):
+        return CaptureStats(self.blocks, self.overflows, self.underflows, self.dropped, self.stale)
+
+    def start(self):
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16,
+                                        channels=self.channels,
+                                        rate=self.rate,
+                                        input=True,
+                                        frames_per_buffer=self.frames_per_buffer,
+                                        stream_callback=self._callback
+                                        )
+        self._stream.start_stream()
+        return self
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
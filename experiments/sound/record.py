@@ -1,43 +1,210 @@
 #!/usr/bin/python3
-import pyaudio
+''' Records audio input to a WAV file while it arrives, for as long as it
+runs. PyAudio's callback only hands each block to a bounded queue; a writer
+thread takes them from there and writes them out, so a slow disk drops
+blocks (counted) instead of stalling the capture. With --last only the
+final seconds are kept, in a ring of blocks written out when recording
+stops.
+
+WAV sizes are 32 bit, so a long recording continues in output-001.wav,
+output-002.wav and so on before a file reaches 4 GiB (about 6.7 hours of
+CD quality stereo each). A write error ends the recording: the writer
+keeps emptying the queue so the capture never blocks, and stop() raises
+the error. '''
+
+import argparse
+import collections
+import os
+import queue
+import threading
+import time
 import wave
 
+import pyaudio
+
 CHUNK = 1024
 FORMAT = pyaudio.paInt16
 CHANNELS = 2
 RATE = 44100
-RECORD_SECONDS = 5
 WAVE_OUTPUT_FILENAME = "output.wav"
+# about 12 seconds of blocks may wait for the writer
+QUEUE_BLOCKS = 512
+# audio bytes per file, the RIFF header counts them in 32 bits
+MAX_FILE_BYTES = 2 ** 32 - 2 ** 16
 
-def main():
-    audio = pyaudio.PyAudio()
-    try:
-        stream = audio.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
-            input=True,
-            frames_per_buffer=CHUNK)
+RecorderStats = collections.namedtuple('RecorderStats', ['blocks', 'written', 'overflows', 'dropped', 'failed',
+                                                         'queued', 'files'])
 
-        print("* recording")
 
-        frames = []
-        for _ in range(0, int(RATE/CHUNK * RECORD_SECONDS)):
-            data = stream.read(CHUNK)
-            frames.append(data)
+class StreamingRecorder(object):
 
-        print("* done recording")
+    def __init__(self, path=WAVE_OUTPUT_FILENAME, channels=CHANNELS, rate=RATE, chunk=CHUNK,
+                 last=None, queue_blocks=QUEUE_BLOCKS, max_file_bytes=MAX_FILE_BYTES):
+        ''' last: keep only this many seconds, written out by stop() '''
+        self.path = path
+        self.channels = channels
+        self.rate = rate
+        self.chunk = chunk
+        self.max_file_bytes = max_file_bytes
+        self.blocks = 0
+        self.written = 0
+        self.overflows = 0
+        self.dropped = 0
+        # blocks lost to a write error, counted by the writer only
+        self.failed = 0
+        self.error = None
+        self.paths = []
+        self._queue = queue.Queue(maxsize=queue_blocks)
+        self._ring = None
+        if last is not None:
+            self._ring = collections.deque(maxlen=max(1, round(last * rate / chunk)))
+        self._wave = None
+        self._wave_bytes = 0
+        self._writer = None
+        self._audio = None
+        self._stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.blocks += 1
+        try:
+            self._queue.put_nowait(in_data)
+        except queue.Full:
+            self.dropped += 1
+        return None, pyaudio.paContinue
+
+    def _open(self):
+        path = self.path
+        if self.paths:
+            root, ext = os.path.splitext(self.path)
+            path = '%s-%03d%s' % (root, len(self.paths), ext)
+        self._wave = wave.open(path, 'wb')
+        self._wave.setnchannels(self.channels)
+        self._wave.setsampwidth(pyaudio.get_sample_size(FORMAT))
+        self._wave.setframerate(self.rate)
+        self._wave_bytes = 0
+        self.paths.append(path)
+
+    def _write_block(self, data):
+        if self._wave_bytes and self._wave_bytes + len(data) > self.max_file_bytes:
+            self._wave.close()
+            self._open()
+        # wave patches the header after every write, so the file stays
+        # readable if the recording is cut short
+        self._wave.writeframes(data)
+        self._wave_bytes += len(data)
+        self.written += 1
+
+    def _write(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            if self.error is not None:
+                self.failed += 1
+                continue
+            try:
+                if self._ring is not None:
+                    self._ring.append(data)
+                else:
+                    self._write_block(data)
+            except Exception as e:
+                # keep draining, a full queue would only drop blocks anyway
+                self.error = e
+                self.failed += 1
+
+    @property
+    def stats(self):
+        return RecorderStats(self.blocks, self.written, self.overflows, self.dropped, self.failed,
+                             self._queue.qsize(), len(self.paths))
+
+    def start(self):
+        self._open()
+
+        self._writer = threading.Thread(target=self._write, name='record-writer', daemon=True)
+        self._writer.start()
+
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=FORMAT,
+                                        channels=self.channels,
+                                        rate=self.rate,
+                                        input=True,
+                                        frames_per_buffer=self.chunk,
+                                        stream_callback=self._callback
+                                        )
+        self._stream.start_stream()
+        return self
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+        if self._writer is not None:
+            # the writer drains the queue, unless it died some other way
+            while self._writer.is_alive():
+                try:
+                    self._queue.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            self._writer.join()
+            self._writer = None
+        if self._wave is not None:
+            try:
+                if self._ring is not None and self.error is None:
+                    for data in self._ring:
+                        self._write_block(data)
+                self._wave.close()
+            except Exception as e:
+                if self.error is None:
+                    self.error = e
+            if self._ring is not None:
+                self._ring.clear()
+            self._wave = None
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main(args):
+    recorder = StreamingRecorder(args.output, chunk=args.chunk, last=args.last)
+    try:
+        with recorder:
+            print("* recording")
+            start = time.monotonic()
+            try:
+                while True:
+                    remaining = 1.0 if args.seconds is None else args.seconds - (time.monotonic() - start)
+                    if remaining <= 0:
+                        break
+                    time.sleep(min(1.0, remaining))
+                    if args.verbose:
+                        print(recorder.stats)
+                    if recorder.error is not None:
+                        break
+            except KeyboardInterrupt:
+                pass
     finally:
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
+        # also after a write error, which stop() raises from here
+        print("* done recording")
+        print(recorder.stats)
 
-    wf = wave.open(WAVE_OUTPUT_FILENAME, 'wb')
-    wf.setnchannels(CHANNELS)
-    wf.setsampwidth(audio.get_sample_size(FORMAT))
-    wf.setframerate(RATE)
-    wf.writeframes(b''.join(frames))
-    wf.close()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Record audio input to a WAV file.')
+    parser.add_argument('--output', default=WAVE_OUTPUT_FILENAME, help='WAV file to write')
+    parser.add_argument('--seconds', type=float, help='Stop after this long, default is until Ctrl+C')
+    parser.add_argument('--last', type=float, metavar='SECONDS', help='Only keep the last SECONDS of audio')
+    parser.add_argument('--chunk', type=int, default=CHUNK, help='Frames per block')
+    parser.add_argument('--verbose', action='store_true', help='Print the counters every second')
+    main(parser.parse_args())
@@ -0,0 +1,64 @@
+''' This module introduces the BandAnalyzer class which splits audio input
+blocks into log-spaced frequency band levels. '''
+
+import numpy as np
+
+from vu_constants import (RATE, SHORT_NORMALIZE, FFT_SIZE, FFT_BANDS, FFT_MIN_FREQ, FFT_MAX_FREQ,
+                          FFT_FLOOR_DB)
+
+
+def band_matrix(size, bands, rate, min_freq, max_freq):
+    ''' (bands, size // 2 + 1) matrix summing the rfft power bins of each
+    log-spaced band. Bands too narrow to contain a bin use the nearest one. '''
+    edges = np.geomspace(min_freq, max_freq, bands + 1)
+    freqs = np.fft.rfftfreq(size, 1.0 / rate)
+    matrix = np.zeros((bands, len(freqs)), dtype=np.float32)
+    for band in range(bands):
+        inside = (freqs >= edges[band]) & (freqs < edges[band + 1])
+        if not inside.any():
+            center = np.sqrt(edges[band] * edges[band + 1])
+            inside = np.abs(freqs - center) == np.abs(freqs - center).min()
+        matrix[band, inside] = 1.0
+    return matrix
+
+
+class BandAnalyzer(object):
+    ''' keeps the last `size` mono samples and turns them into `bands` levels
+    between 0 (FFT_FLOOR_DB and below) and 1 (full scale sine). Window, band
+    mapping and scaling are computed once, so each block costs one rfft and
+    one matrix product. Blocks shorter than `size` are fine and give
+    overlapping analysis windows. '''
+
+    def __init__(self, bands=FFT_BANDS, size=FFT_SIZE, channels=2, rate=RATE,
+                 min_freq=FFT_MIN_FREQ, max_freq=FFT_MAX_FREQ, floor_db=FFT_FLOOR_DB):
+        self.bands = bands
+        self.size = size
+        self.channels = channels
+        self.floor_db = floor_db
+        self.window = np.hanning(size).astype(np.float32)
+        self.matrix = band_matrix(size, bands, rate, min_freq, max_freq)
+        # full scale sine peaks at (sum(window) / 2)**2 in the power spectrum
+        self.scale = (SHORT_NORMALIZE / (self.window.sum() / 2)) ** 2
+        self._history = np.zeros(size, dtype=np.float32)
+        self._power = np.empty(size // 2 + 1, dtype=np.float32)
+
+    def analyze(self, block):
+        ''' band levels of a block of interleaved 16 bit audio input data '''
+        samples = np.frombuffer(block, dtype=np.int16).reshape(-1, self.channels)
+        mono = samples.mean(axis=1, dtype=np.float32)
+
+        history = self._history
+        n = len(mono)
+        if n >= self.size:
+            history[:] = mono[-self.size:]
+        else:
+            history[:-n] = history[n:]
+            history[-n:] = mono
+
+        spectrum = np.fft.rfft(history * self.window)
+        np.square(spectrum.real, out=self._power)
+        self._power += np.square(spectrum.imag)
+
+        energy = self.matrix @ self._power
+        db = 10 * np.log10(energy * self.scale + 1e-12)
+        return np.clip(1 - db / self.floor_db, 0.0, 1.0)
@@ -2,3 +2,9 @@ RATE = 44100
 INPUT_BLOCK_TIME = 0.05
 INPUT_FRAMES_PER_BLOCK = int(RATE*INPUT_BLOCK_TIME)
 SHORT_NORMALIZE = 1.0 / 32768.0
+FFT_SIZE = 2048
+FFT_HOP = 512
+FFT_BANDS = 16
+FFT_MIN_FREQ = 40
+FFT_MAX_FREQ = 16000
+FFT_FLOOR_DB = -60
@@ -1,182 +1,175 @@
 #!/usr/bin/python3
 import argparse
-import random
+import collections
+import os
+import sys
 
-import pyaudio
+import numpy as np
 
 from amplitude import Amplitude
-from pyledstrip import LedStrip
-from vu_constants import RATE, INPUT_FRAMES_PER_BLOCK
+from capture import AudioCapture
+from spectrum import BandAnalyzer
+from vu_constants import FFT_HOP, FFT_BANDS
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+
+from entities import Entities  # noqa: E402
+from framebuffer import FrameBuffer, hsv_to_rgb  # noqa: E402
+from framefile import FrameRecorder  # noqa: E402
+import profiler  # noqa: E402
+from pyledstrip import LedStrip  # noqa: E402
+from runtime import Runtime  # noqa: E402
 
 # !/usr/bin/env python
 # coding: utf-8
 
 PERIOD = 0.05
+LAUNCH_LEVEL = 0.6
+DEBRIS_PER_ROCKET = 3
+DEBRIS_LIFETIME = 3
 
-
-
-class Debris:
-    def __init__(self, pos, v, ch, cs, cv):
-        self.pos = pos
-        self.v = v
-        self.ch = ch
-        self.cs = cs
-        self.cv = cv
-        self.age = 0
-
-    def move(self, t):
-        self.age += t
-        self.cv *= 0.9
-        self.pos += self.v * t
-
-        if self.age > 3:
-            return []
-        else:
-            return [self]
-
-    def paint(self, strip: LedStrip):
-        strip.add_hsv(self.pos,
-                      random.uniform(0,1), #0.33,  # self.ch,
-                      self.cs,
-                      self.cv / 100
-                      )
-
-
-class Rocket:
-    def __init__(self, pos, v, ch, cs, cv):
-        self.pos = pos
-        self.v = v
-        self.ch = ch
-        self.cs = cs
-        self.cv = cv
-        self.age = 0
-
-    def move(self, t):
-        self.age += t
-        self.pos += self.v * t
-
-        if g_amp > 120: # self.age > 3:
-            debris = []
-            for i in range(3):
-                item = Debris(self.pos, 10 * random.uniform(-1, 1), random.uniform(0, 1), 1, 1)
-                debris.append(item)
-            return debris
-        else:
-            return [self]
-
-    def paint(self, strip: LedStrip):
-        strip.add_hsv(self.pos,
-                      0.16,  # self.ch,
-                      self.cs, self.cv)
-
-
-class Launcher:
-    def __init__(self, pos, ch, cs, cv):
-        self.pos = pos
-        self.ch = ch
-        self.cs = cs
-        self.cv = cv
-        self.age = 0
-        self.freq = 0.5 * random.uniform(0.0, 1)
-
-    def move(self, t):
-        self.age += t
-
-        if self.age > self.freq:
-            self.age -= self.freq
-            rocket = Rocket(
-                self.pos,
-                10 * random.uniform(0.5, 1) * random.choice([1,-1]),
-                random.uniform(0, 1),
-                1,
-                1
-            )
-            return [self, rocket]
-        else:
-            return [self]
-
-    def paint(self, strip: LedStrip):
-        strip.add_hsv(self.pos,
-                      0.00,  # self.ch,
-                      self.cs, self.cv)
+# broadband amplitude (scaled to 0..300) and FFT band levels (0..1) of the
+# newest audio block
+Sound = collections.namedtuple('Sound', ['amp', 'bands'])
 
 
 class World:
+    """ launchers fire when their slice of the FFT bands gets loud, rockets
+    take the hue of the band and burst into debris on a loud beat """
 
-    def __init__(self, strip: LedStrip):
+    def __init__(self, strip: LedStrip, seed=None):
         worldsize = strip.led_count
-
-        self.lauchners = []
-        for i in range(3):
-            self.lauchners.append(
-                Launcher(
-                    random.uniform(0, worldsize),
-                    0,
-                    1,
-                    1
-                )
+        self.sound = Sound(0, np.zeros(FFT_BANDS))
+        self.rng = np.random.default_rng(seed)
+        self.frame = FrameBuffer(worldsize)
+
+        self.entities = Entities()
+        self.launchers = self.entities.pool('launcher', pos=float, ch=float, cs=float, cv=float, age=float,
+                                            freq=float, band_start=int, band_stop=int)
+        self.rockets = self.entities.pool('rocket', pos=float, v=float, ch=float, cs=float, cv=float, age=float)
+        self.debris = self.entities.pool('debris', pos=float, v=float, ch=float, cs=float, cv=float, age=float)
+
+        band_start = np.arange(3) * FFT_BANDS // 3
+        band_stop = (np.arange(3) + 1) * FFT_BANDS // 3
+        self.launchers.spawn(
+            pos=self.rng.uniform(0, worldsize, 3),
+            band_start=band_start,
+            band_stop=band_stop,
+            ch=(band_start + band_stop) / 2 / FFT_BANDS,
+            cs=1,
+            cv=1,
+            freq=0.5 * self.rng.uniform(0.0, 1, 3)
+        )
+
+    def hear(self, sound):
+        self.sound = sound
+
+    def move(self, t, sound):
+        rng = self.rng
+
+        launchers = self.launchers
+        i = launchers.live
+        launchers.age[i] += t
+        # there are only a few launchers, each listening to its own bands
+        level = np.array([sound.bands[start:stop].max()
+                          for start, stop in zip(launchers.band_start[i], launchers.band_stop[i])])
+        firing = (launchers.age[i] > launchers.freq[i]) & (level >= LAUNCH_LEVEL)
+        fire = i[firing]
+        launchers.age[fire] = 0
+        self.entities.request(
+            'rocket',
+            pos=launchers.pos[fire],
+            v=10 * (0.5 + 0.5 * level[firing]) * rng.choice([1, -1], len(fire)),
+            ch=(launchers.ch[fire] + rng.uniform(-0.05, 0.05, len(fire))) % 1.0,
+            cs=1,
+            cv=1
+        )
+
+        rockets = self.rockets
+        i = rockets.live
+        rockets.age[i] += t
+        rockets.pos[i] += rockets.v[i] * t
+        if sound.amp > 120:  # self.age > 3:
+            count = len(i) * DEBRIS_PER_ROCKET
+            self.entities.request(
+                'debris',
+                pos=np.repeat(rockets.pos[i], DEBRIS_PER_ROCKET),
+                v=10 * rng.uniform(-1, 1, count),
+                ch=np.repeat(rockets.ch[i], DEBRIS_PER_ROCKET),
+                cs=1,
+                cv=1
             )
+            rockets.kill(i)
+
+        debris = self.debris
+        i = debris.live
+        debris.age[i] += t
+        debris.cv[i] *= 0.9
+        debris.pos[i] += debris.v[i] * t
+        debris.kill(i[debris.age[i] > DEBRIS_LIFETIME])
+
+        # new entities show up right away but move from the next tick on
+        self.entities.flush()
+
+    def paint(self):
+        launchers, rockets, debris = self.launchers, self.rockets, self.debris
+        li, ri, di = launchers.live, rockets.live, debris.live
+        pos = np.concatenate((launchers.pos[li], rockets.pos[ri], debris.pos[di]))
+        hue = np.concatenate((
+            np.zeros(len(li)),  # launchers.ch
+            rockets.ch[ri],
+            (debris.ch[di] + self.rng.uniform(-0.05, 0.05, len(di))) % 1.0,
+        ))
+        sat = np.concatenate((launchers.cs[li], rockets.cs[ri], debris.cs[di]))
+        val = np.concatenate((launchers.cv[li], rockets.cv[ri], debris.cv[di] / 100))
+        self.frame.add_rgb(pos, hsv_to_rgb(hue, sat, val), loop=True)
 
     def update(self, strip: LedStrip):
-        strip.clear()
+        self.frame.clear()
 
-        newStuff = []
-        for rocket in self.lauchners:
-            results = rocket.move(PERIOD)  # tickrate is perfect
-            newStuff += results
+        with profiler.phase('simulate'):
+            self.move(PERIOD, self.sound)  # tickrate is perfect
 
-        self.lauchners = newStuff
+        with profiler.phase('paint'):
+            self.paint()
 
-        for rocket in self.lauchners:
-            rocket.paint(strip)
-
-        strip.transmit()
+        self.frame.show(strip)
 
 
 def main(args):
     strip = LedStrip(args=args, loop=True, flip=True)
+    if args.record:
+        # play it back later with framefile.py play, the frames are recorded
+        # before the strip flips them
+        strip = FrameRecorder(strip, args.record)
     w = World(strip)
-    audio = pyaudio.PyAudio()
-    try:
-        stream = audio.open(format=pyaudio.paInt16,
-                            channels=2,
-                            rate=RATE,
-                            input=True,
-                            frames_per_buffer=INPUT_FRAMES_PER_BLOCK
-                            )
-
-        maximal = Amplitude()
-        while True:
-            data = stream.read(INPUT_FRAMES_PER_BLOCK)
-            amp = Amplitude.from_data(data)
-            if amp > maximal:
-                maximal = amp
-            #amp.display(scale=600, mark=maximal)
-            update(None, strip, amp.to_int(scale=300), w)
-    finally:
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
+    runtime = Runtime()
 
-g_amp = 0
+    analyzer = BandAnalyzer(channels=2)
 
+    def analyze(block):
+        return Sound(Amplitude.from_data(block).to_int(scale=300), analyzer.analyze(block))
 
-def update(self, strip: LedStrip, amp, w):
-    #  strip.clear()
-    #
-    # print("amp is %s" % amp)
-    #
-    #  for i in range(amp):
-    #      strip.set_pixel_rgb(i, 1, 0,0 )
-    #
-#  strip.transmit()
-    global g_amp
-    g_amp = amp
-    w.update(strip)
-
+    # audio is captured and analyzed on PyAudio's callback thread in small
+    # hops and handed to the world on the render loop, which runs on its own
+    # clock and always paints the newest analysis
+    capture = AudioCapture(analyze, channels=2, frames_per_buffer=FFT_HOP, initial=w.sound)
+    runtime.on_audio(capture, w.hear)
+    scheduler = runtime.every(PERIOD, w.update, strip)
+    try:
+        runtime.run()
+    finally:
+        stats = capture.stats
+        # the runtime never reads a block twice, so there is no stale count
+        print('blocks %d overflows %d underflows %d dropped %d' % (
+            stats.blocks, stats.overflows, stats.underflows, stats.dropped))
+        print(scheduler.stats)
+        if args.record:
+            strip.close()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Example code for pyledstrip.')
     LedStrip.add_arguments(parser)
+    parser.add_argument('--record', metavar='FILE', help='Also record the frames to a frame file')
     main(parser.parse_args())
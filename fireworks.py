@@ -2,11 +2,14 @@
 # coding: utf-8
 
 import argparse
-import random
 import time
 
-from periodicx import periodicx
+import numpy as np
+
+from framebuffer import FrameBuffer, hue_to_rgb
+from particles import ParticlePool
 from pyledstrip import LedStrip
+from scheduler import periodic
 
 # one sided launcher
 EXPLOSION_SPEED = 0.05
@@ -32,120 +35,86 @@ ROCKET_SPEED_MAX = 8.5
 # ROCKET_SPEED_MAX = 4.0
 
 
-class Rocket:
-    pos = 0
-    speed = 0
-    lastbright = False
-
-    def __init__(self, pos, speed):
-        self.pos = pos
-        self.speed = speed
-
-    def update(self):
-        self.pos += self.speed
-        self.speed *= 0.97
-
-    def draw(self, strip):
-        brightness = 1.0
-        if self.lastbright:
-            brightness = 0.0
-
-        self.lastbright = not self.lastbright
-        strip.add_rgb(self.pos, brightness, brightness, brightness)
-
-
-class Particle:
-    pos = 0
-    speed = 0
-    hue = 0
-    brightness = 0
-    decay = 0
-
-    def __init__(self, pos, speed, hue, brightness, decay=0.95):
-        self.pos = pos
-        self.speed = speed
-        self.hue = hue
-        self.brightness = brightness
-        self.decay = decay
-
-    def update(self):
-        self.pos += self.speed
-        self.speed *= 0.985
-        self.brightness *= self.decay
-
-    def draw(self, strip):
-        strip.add_hsv(self.pos, self.hue, 1.0, self.brightness)
-
-
 def maprange(value, frommin, frommax, tomin, tomax):
     return tomin + (tomax - tomin) * (value - frommin) / (frommax - frommin)
 
 
 class Fireworks:
     PERIOD = 1 / 60
+    CAPACITY = 16384
 
-    rockets = []
-    particles = []
-    next_rocket = 0
+    def __init__(self, strip, seed=None):
+        self.frame = FrameBuffer(strip.led_count)
+        self.rng = np.random.default_rng(seed)
+        self.rockets = ParticlePool(64, damping=0.97)
+        self.particles = ParticlePool(self.CAPACITY, damping=0.985)
+        self.next_rocket = 0
 
     def launchrocket(self):
-        self.rockets.append(Rocket(
-            ROCKET_LAUNCH_POS,
-            random.choice(ROCKET_LAUNCH_DIRECTIONS) * random.uniform(ROCKET_SPEED_MIN, ROCKET_SPEED_MAX)
-        ))
-
-    def explosion(self, center):
-        color_center = random.random()
-        size = random.randrange(EXPLOSION_SIZE_MIN, EXPLOSION_SIZE_MAX)
-        for i in range(0, size):
-            self.particles.append(Particle(
+        self.rockets.spawn(
+            pos=ROCKET_LAUNCH_POS,
+            speed=self.rng.choice(ROCKET_LAUNCH_DIRECTIONS) * self.rng.uniform(ROCKET_SPEED_MIN, ROCKET_SPEED_MAX),
+            hue=0.0,
+            brightness=1.0,
+            decay=1.0
+        )
+
+    def explosion(self, centers):
+        for center in centers:
+            color_center = self.rng.random()
+            size = int(self.rng.integers(EXPLOSION_SIZE_MIN, EXPLOSION_SIZE_MAX))
+            max_speed = maprange(
+                size,
+                EXPLOSION_SIZE_MIN, EXPLOSION_SIZE_MAX,
+                EXPLOSION_SPEED_MIN, EXPLOSION_SPEED_MAX
+            )
+            self.particles.spawn(
                 pos=center,
-                speed=random.choice([-1.0, 1.0]) * random.uniform(0.0, maprange(
-                    size,
-                    EXPLOSION_SIZE_MIN, EXPLOSION_SIZE_MAX,
-                    EXPLOSION_SPEED_MIN, EXPLOSION_SPEED_MAX
-                )),
-                hue=(color_center + random.choice([-0.25, 0.25])) % 1.0,
-                brightness=random.uniform(0.6, 1.0)
-            ))
-
-    def trail(self, pos):
-        self.particles.append(Particle(
-            pos=pos,
+                speed=self.rng.choice([-1.0, 1.0], size) * self.rng.uniform(0.0, max_speed, size),
+                hue=(color_center + self.rng.choice([-0.25, 0.25], size)) % 1.0,
+                brightness=self.rng.uniform(0.6, 1.0, size)
+            )
+
+    def trail(self, positions):
+        size = len(positions)
+        self.particles.spawn(
+            pos=positions,
             speed=0,
-            hue=random.uniform(0.0, 0.2) % 1.0,
-            brightness=random.uniform(0.1, 0.2),
-            decay=0.8)
+            hue=self.rng.uniform(0.0, 0.2, size) % 1.0,
+            brightness=self.rng.uniform(0.1, 0.2, size),
+            decay=0.8
         )
 
     def update(self, strip):
         if time.time() >= self.next_rocket:
             self.launchrocket()
-            self.next_rocket = time.time() + random.uniform(0.9, 3.0)
-
-        strip.clear()
-
-        for particle in self.particles:
-            particle.update()
-            particle.draw(strip)
+            self.next_rocket = time.time() + self.rng.uniform(0.9, 3.0)
 
-        self.particles = list(filter(lambda item: item.brightness > 0.01, self.particles))
+        self.frame.clear()
 
-        for rocket in self.rockets:
-            self.trail(rocket.pos)
-            rocket.update()
-            rocket.draw(strip)
-            if abs(rocket.speed) <= EXPLOSION_SPEED:
-                self.explosion(rocket.pos)
+        particles = self.particles
+        particles.update()
+        n = particles.count
+        self.frame.add_rgb(particles.pos[:n], hue_to_rgb(particles.hue[:n], particles.brightness[:n]))
+        particles.compact(particles.brightness[:n] > 0.01)
 
-        self.rockets = list(filter(lambda rocket: abs(rocket.speed) > EXPLOSION_SPEED, self.rockets))
+        rockets = self.rockets
+        n = rockets.count
+        self.trail(rockets.pos[:n].copy())
+        rockets.update()
+        # rockets flash on every other frame
+        flash = (rockets.age[:n] % 2 == 1).astype(np.float32)
+        self.frame.add_rgb(rockets.pos[:n], 1.0, intensities=flash)
+        flying = np.abs(rockets.speed[:n]) > EXPLOSION_SPEED
+        self.explosion(rockets.pos[:n][~flying])
+        rockets.compact(flying)
 
-        strip.transmit()
+        self.frame.show(strip)
 
 
 def main(args):
     strip = LedStrip(args=args)
-    periodicx(Fireworks().update, Fireworks.PERIOD, strip)
+    periodic(Fireworks(strip).update, Fireworks.PERIOD, strip)
 
 
 if __name__ == '__main__':
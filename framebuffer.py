@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Whole-strip frame buffer. Effects render into a preallocated float32
+# (led_count, 3) RGB array with vectorized NumPy operations and hand the
+# finished frame to the strip in one call instead of calling set_pixel_rgb
+# from inside their per-LED math.
+
+import numpy as np
+
+import profiler
+from splat import LINEAR, splat
+
+HUE_STEPS = 4096
+
+
+def hsv_to_rgb(hue, sat, val, out=None):
+    """Vectorized equivalent of colorsys.hsv_to_rgb for arrays of equal length
+    (scalars broadcast). Returns an (N, 3) float32 array."""
+    hue, sat, val = np.broadcast_arrays(
+        np.asarray(hue, dtype=np.float32),
+        np.asarray(sat, dtype=np.float32),
+        np.asarray(val, dtype=np.float32),
+    )
+    if out is None:
+        out = np.empty(hue.shape + (3,), dtype=np.float32)
+
+    h6 = (hue % 1.0) * 6.0
+    whole = np.floor(h6)
+    f = h6 - whole
+    sector = whole.astype(np.int8) % 6
+    p = val * (1.0 - sat)
+    q = val * (1.0 - sat * f)
+    t = val * (1.0 - sat * (1.0 - f))
+
+    out[..., 0] = np.choose(sector, (val, q, p, p, t, val))
+    out[..., 1] = np.choose(sector, (t, val, val, q, p, p))
+    out[..., 2] = np.choose(sector, (p, p, t, val, val, q))
+    return out
+
+
+class HueTable:
+    """Fully saturated colors of `steps` evenly spaced hues. Looking colors up
+    is cheaper than converting them, and with the default 4096 steps the
+    error stays far below one step of an 8-bit LED channel."""
+
+    def __init__(self, steps: int = HUE_STEPS):
+        self.steps = steps
+        self.colors = hsv_to_rgb(np.arange(steps, dtype=np.float32) / steps, 1.0, 1.0)
+
+    def __call__(self, hue, val=1.0, out=None):
+        """hsv_to_rgb(hue, 1, val) for an (N,) hue array, val is an (N,)
+        array or a scalar. Returns an (N, 3) float32 array."""
+        index = np.rint(np.multiply(hue, self.steps, dtype=np.float64)).astype(np.intp)
+        index %= self.steps
+        out = np.take(self.colors, index, axis=0, out=out)
+        if np.ndim(val) > 0:
+            out *= np.asarray(val, dtype=np.float32)[:, np.newaxis]
+        elif val != 1.0:
+            out *= np.float32(val)
+        return out
+
+
+_hue_table = None
+
+
+def hue_to_rgb(hue, val=1.0, out=None):
+    """hsv_to_rgb(hue, 1, val) through a shared HueTable."""
+    global _hue_table
+    if _hue_table is None:
+        _hue_table = HueTable()
+    return _hue_table(hue, val, out)
+
+
+def blit(strip, pixels):
+    """Copy an (N, 3) RGB array onto the strip's pixels. Strips that accept a
+    whole frame at once provide set_pixels(); everything else gets the frame
+    pushed through set_pixel_rgb."""
+    set_pixels = getattr(strip, 'set_pixels', None)
+    if set_pixels is not None:
+        set_pixels(pixels)
+        return
+
+    set_pixel_rgb = strip.set_pixel_rgb
+    for i, (red, green, blue) in enumerate(pixels.tolist()):
+        set_pixel_rgb(i, red, green, blue)
+
+
+class FrameBuffer:
+    def __init__(self, led_count: int):
+        self.led_count = led_count
+        self.pixels = np.zeros((led_count, 3), dtype=np.float32)
+        # LED index as float, for effects that are a function of position
+        self.positions = np.arange(led_count, dtype=np.float32)
+
+    def clear(self):
+        self.pixels.fill(0.0)
+
+    def set_rgb(self, red, green, blue):
+        """Set the whole frame from per-channel arrays or scalars."""
+        self.pixels[:, 0] = red
+        self.pixels[:, 1] = green
+        self.pixels[:, 2] = blue
+
+    def set_hsv(self, hue, sat, val):
+        """Set the whole frame from per-channel HSV arrays or scalars."""
+        hsv_to_rgb(
+            np.broadcast_to(hue, (self.led_count,)),
+            np.broadcast_to(sat, (self.led_count,)),
+            np.broadcast_to(val, (self.led_count,)),
+            out=self.pixels
+        )
+
+    def set_hue(self, hue, val=1.0):
+        """Set the whole frame to fully saturated hues, through the hue table."""
+        hue_to_rgb(np.broadcast_to(hue, (self.led_count,)), val, out=self.pixels)
+
+    def add_rgb(self, positions, colors, loop=False, kernel=LINEAR, intensities=None):
+        """Accumulate colors at float positions, spread over the nearby LEDs by
+        kernel (see splat.py). The default splits them linearly between the two
+        nearest LEDs like LedStrip.add_rgb. positions is (N,), colors (N, 3)."""
+        splat(self.pixels, positions, colors, intensities=intensities, kernel=kernel, loop=loop)
+
+    def add_spans(self, starts, stops, colors):
+        """Add colors ((N, 3), or one color for all) to the LED ranges
+        [starts, stops), clipped to the strip. Costs the same for any span
+        width: the spans are marked in a difference array and summed up."""
+        starts = np.clip(starts, 0, self.led_count)
+        stops = np.clip(stops, 0, self.led_count)
+        colors = np.broadcast_to(np.asarray(colors, dtype=np.float32), (len(starts), 3))
+        delta = np.zeros((self.led_count + 1, 3), dtype=np.float32)
+        np.add.at(delta, starts, colors)
+        np.subtract.at(delta, stops, colors)
+        self.pixels += np.cumsum(delta[:-1], axis=0)
+
+    def add_span(self, start, stop, color):
+        """Add one color to the LEDs [start, stop), clipped to the strip."""
+        start = min(max(start, 0), self.led_count)
+        stop = min(max(stop, 0), self.led_count)
+        self.pixels[start:stop] += color
+
+    def show(self, strip):
+        """Hand the frame to the strip and transmit it."""
+        with profiler.phase('transmit'):
+            blit(strip, self.pixels)
+            strip.transmit()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Recorded shows. FrameRecorder wraps a strip and appends every transmitted
+# frame with its timestamp to a file, Player streams such a file back to a
+# strip at the recorded or a scaled rate. Playing a recording costs a blit
+# per frame instead of the simulation that produced it.
+#
+# The file is a fixed header followed by fixed-size records of
+#   time    float64, seconds since the first frame
+#   pixels  float32 (led_count, 3) RGB
+# so frame i sits at a known offset and the player maps the whole file into
+# memory instead of reading it.
+#
+# Only frames handed over through set_pixels() (FrameBuffer.show, blit) are
+# recorded, like with TransmitFilter.
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from compositor import create_effect
+from framebuffer import blit
+from pyledstrip import LedStrip
+from scheduler import Scheduler
+
+MAGIC = b'LEDFRAME'
+VERSION = 1
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('led_count', '<u4'),
+    ('reserved', 'V16'),
+])
+MAX_FPS = 240
+
+
+def frame_dtype(led_count):
+    return np.dtype([('time', '<f8'), ('pixels', '<f4', (led_count, 3))])
+
+
+class FrameRecorder:
+    def __init__(self, strip, path, clock=time.monotonic):
+        self.strip = strip
+        self.clock = clock
+        self.frames = 0
+        self._record = np.zeros(1, dtype=frame_dtype(strip.led_count))
+        self._start = None
+
+        header = np.zeros(1, dtype=HEADER)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['led_count'] = strip.led_count
+        self._file = open(path, 'wb')
+        self._file.write(header.tobytes())
+
+    def __getattr__(self, name):
+        return getattr(self.strip, name)
+
+    def set_pixels(self, pixels):
+        self._record['pixels'][0] = pixels
+        blit(self.strip, pixels)
+
+    def transmit(self):
+        now = self.clock()
+        if self._start is None:
+            self._start = now
+        self._record['time'] = now - self._start
+        self._file.write(memoryview(self._record))
+        self.frames += 1
+        self.strip.transmit()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FrameFile:
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header['magic'][0] != MAGIC:
+            raise ValueError('%s is not a frame file' % path)
+        if header['version'][0] != VERSION:
+            raise ValueError('%s has unsupported version %d' % (path, header['version'][0]))
+        self.led_count = int(header['led_count'][0])
+
+        dtype = frame_dtype(self.led_count)
+        with open(path, 'rb') as f:
+            size = f.seek(0, 2)
+        # a recording that was cut off may end in a partial frame
+        count = (size - HEADER.itemsize) // dtype.itemsize
+        if count == 0:
+            raise ValueError('%s has no frames' % path)
+        self.records = np.memmap(path, dtype=dtype, mode='r', offset=HEADER.itemsize, shape=(count,))
+        self.times = self.records['time']
+        self.pixels = self.records['pixels']
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def duration(self):
+        """Length of the show, the last frame lasts as long as the one before."""
+        if len(self) < 2:
+            return 0.0
+        return float(2 * self.times[-1] - self.times[-2])
+
+
+class Player:
+    def __init__(self, strip, frames: FrameFile, rate=1.0, loop=False, clock=time.monotonic):
+        if frames.led_count != strip.led_count:
+            raise ValueError('recorded %d LEDs, the strip has %d' % (frames.led_count, strip.led_count))
+        self.strip = strip
+        self.frames = frames
+        self.rate = rate
+        self.loop = loop
+        self.clock = clock
+        self.done = False
+        self._start = None
+
+    def update(self):
+        """Show the frame that is due and return the seconds until the next."""
+        frames = self.frames
+        now = self.clock()
+        if self._start is None:
+            self._start = now
+        position = (now - self._start) * self.rate
+        if self.loop and frames.duration > 0:
+            position %= frames.duration
+
+        # the latest frame that is due, frames that were missed are skipped
+        i = max(int(np.searchsorted(frames.times, position, side='right')) - 1, 0)
+        blit(self.strip, frames.pixels[i])
+        self.strip.transmit()
+
+        if i + 1 < len(frames):
+            return (frames.times[i + 1] - position) / self.rate
+        if self.loop and frames.duration > 0:
+            return (frames.duration - position) / self.rate
+        self.done = True
+        return math.inf
+
+    def run(self):
+        scheduler = Scheduler(1 / MAX_FPS, clock=self.clock)
+        while not self.done:
+            scheduler.run(self.update, frames=1)
+
+
+def record(args):
+    strip = LedStrip(args=args)
+    with FrameRecorder(strip, args.file) as recorder:
+        cls, func, func_args = create_effect(recorder, args.effect)
+        frames = round(args.seconds / cls.PERIOD) if args.seconds else None
+        try:
+            Scheduler(cls.PERIOD).run(func, *func_args, frames=frames)
+        except KeyboardInterrupt:
+            pass
+        print('recorded %d frames' % recorder.frames)
+
+
+def play(args):
+    strip = LedStrip(args=args)
+    Player(strip, FrameFile(args.file), args.rate, args.loop).run()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Record effects to a file and play them back.')
+    LedStrip.add_arguments(parser)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    recorder = commands.add_parser('record', help='Run an effect and record its frames')
+    recorder.add_argument('file', help='Frame file to write')
+    recorder.add_argument('effect', help="Effect module, or 'module.Class'")
+    recorder.add_argument('--seconds', type=float, help='Stop after this long, default is until Ctrl+C')
+    recorder.set_defaults(func=record)
+
+    player = commands.add_parser('play', help='Play a recorded frame file')
+    player.add_argument('file', help='Frame file to play')
+    player.add_argument('--rate', type=float, default=1.0, help='Playback speed, 2 is twice as fast')
+    player.add_argument('--loop', action='store_true', help='Start over at the end')
+    player.set_defaults(func=play)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -4,8 +4,12 @@
 import argparse
 import time
 
-from periodicx import periodicx
+import numpy as np
+
+from framebuffer import FrameBuffer
 from pyledstrip import LedStrip
+from scheduler import periodic
+from transmitfilter import TransmitFilter
 
 
 class Mod:
@@ -13,24 +17,44 @@ class Mod:
     SEC_PER_STEP = 1.8
     POS_PER_STEP = 53
     HUE_PER_STEP = 0.2341
+    # wake up this long after a change so rounding cannot land just before it
+    CHANGE_MARGIN = 0.002
+
+    def __init__(self, strip):
+        self.frame = FrameBuffer(strip.led_count)
+        # double precision throughout, render() and next_change() work on the
+        # same step counts and so agree on which LEDs have changed
+        self._pos_steps = np.arange(strip.led_count, dtype=np.float64) / self.POS_PER_STEP
+
+    def _steps(self, t):
+        return self._pos_steps + t / self.SEC_PER_STEP
+
+    def render(self, t):
+        hue = np.floor(self._steps(t))
+        hue *= self.HUE_PER_STEP
+        hue %= 1.0
+        self.frame.set_hue(hue)
+
+    def next_change(self, t):
+        """Seconds from t until the first LED changes its hue."""
+        steps = self._steps(t)
+        return float((np.floor(steps) + 1.0 - steps).min()) * self.SEC_PER_STEP
 
     def update(self, strip):
-        for pos in range(strip.led_count):
-            strip.set_hsv(
-                pos,
-                (int(time.time() / self.SEC_PER_STEP + pos / self.POS_PER_STEP) * self.HUE_PER_STEP) % 1.0,
-                1.0,
-                1.0
-            )
-        strip.transmit()
+        t = time.time()
+        self.render(t)
+        self.frame.show(strip)
+        return self.next_change(t) + self.CHANGE_MARGIN
 
 
 def main(args):
-    strip = LedStrip(args=args)
-    periodicx(Mod().update, Mod.PERIOD, strip)
+    # the frame only changes now and then, do not resend identical ones
+    strip = TransmitFilter(LedStrip(args=args), args.keepalive)
+    periodic(Mod(strip).update, Mod.PERIOD, strip, max_idle=args.keepalive)
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Example code for pyledstrip.')
     LedStrip.add_arguments(parser)
+    TransmitFilter.add_arguments(parser)
     main(parser.parse_args())
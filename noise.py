@@ -2,26 +2,34 @@
 # coding: utf-8
 
 import argparse
-import random
 
-from periodicx import periodicx
+import numpy as np
+
+from framebuffer import FrameBuffer, hue_to_rgb
 from pyledstrip import LedStrip
+from scheduler import periodic
 
 
 class Noise:
     PERIOD = 1.5
 
-    @staticmethod
-    def update(strip):
-        strip.clear()
-        for i in range(int(strip.led_count / 3)):
-            strip.set_hsv(int(random.random() * strip.led_count), random.random(), 1.0, 1.0)
-        strip.transmit()
+    def __init__(self, strip, seed=None):
+        self.frame = FrameBuffer(strip.led_count)
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, strip):
+        self.frame.clear()
+        count = int(strip.led_count / 3)
+        leds = (self.rng.random(count) * strip.led_count).astype(np.intp)
+        self.frame.pixels[leds] = hue_to_rgb(self.rng.random(count))
+        self.frame.show(strip)
+        # the noise holds until it is redrawn
+        return Noise.PERIOD
 
 
 def main(args):
     strip = LedStrip(args=args)
-    periodicx(Noise().update, Noise.PERIOD, strip)
+    periodic(Noise(strip).update, Noise.PERIOD, strip)
 
 
 if __name__ == '__main__':
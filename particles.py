@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Fixed-capacity particle storage. Every attribute lives in its own
+# preallocated array, the first `count` slots are live. Particles are moved
+# in batch and dead ones are dropped by compacting the live prefix with a
+# mask, so a frame allocates no per-particle objects.
+
+import numpy as np
+
+
+class ParticlePool:
+    def __init__(self, capacity: int, damping: float = 1.0):
+        self.capacity = capacity
+        self.damping = damping
+        self.count = 0
+
+        self.pos = np.zeros(capacity, dtype=np.float32)
+        self.speed = np.zeros(capacity, dtype=np.float32)
+        self.hue = np.zeros(capacity, dtype=np.float32)
+        self.brightness = np.zeros(capacity, dtype=np.float32)
+        self.decay = np.zeros(capacity, dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.uint32)
+
+        self._arrays = (self.pos, self.speed, self.hue, self.brightness, self.decay, self.age)
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, pos, speed, hue, brightness, decay=0.95):
+        """Append particles, arguments are arrays or scalars broadcast to the
+        longest one. Particles that do not fit are dropped, returns how many
+        were added."""
+        pos, speed, hue, brightness, decay = np.broadcast_arrays(pos, speed, hue, brightness, decay)
+        n = min(pos.size, self.capacity - self.count)
+        if n <= 0:
+            return 0
+
+        live = slice(self.count, self.count + n)
+        self.pos[live] = pos.ravel()[:n]
+        self.speed[live] = speed.ravel()[:n]
+        self.hue[live] = hue.ravel()[:n]
+        self.brightness[live] = brightness.ravel()[:n]
+        self.decay[live] = decay.ravel()[:n]
+        self.age[live] = 0
+        self.count += n
+        return n
+
+    def update(self):
+        n = self.count
+        self.pos[:n] += self.speed[:n]
+        self.speed[:n] *= self.damping
+        self.brightness[:n] *= self.decay[:n]
+        self.age[:n] += 1
+
+    def compact(self, alive):
+        """Keep only the live particles where alive (a bool array of length
+        count) is set, preserving their order."""
+        n = int(np.count_nonzero(alive))
+        if n == self.count:
+            return
+        for array in self._arrays:
+            array[:n] = array[:self.count][alive]
+        self.count = n
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Opt-in per-phase frame profiling. Code marks the phases of a frame with
+#
+#   with profiler.phase('simulate'):
+#       ...
+#
+# The scheduler times every frame as 'frame' and FrameBuffer.show() times
+# 'transmit'. While profiling is off, phase() hands out one shared no-op
+# context manager, so the marks cost a function call.
+#
+# Turn it on from code with enable() or for any script from the environment:
+#   LEDSTRIP_PROFILE=1 python sines.py             summary on exit
+#   LEDSTRIP_PROFILE=frames.csv python sines.py    also every phase as CSV
+#
+# The summary covers the last `window` samples of every phase and a
+# histogram of all of them in power-of-two buckets.
+
+import atexit
+import collections
+import contextlib
+import csv
+import os
+import statistics
+import sys
+import time
+
+ENVIRONMENT = 'LEDSTRIP_PROFILE'
+DEFAULT_WINDOW = 1000
+
+_NULL = contextlib.nullcontext()
+_active = None
+
+
+class Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+
+
+class Profiler:
+    def __init__(self, window=DEFAULT_WINDOW, csv_file=None):
+        self.window = window
+        self.frame = 0
+        self.durations = {}
+        # histogram bucket b counts durations below 2 ** b ns
+        self.histograms = {}
+        self._phases = {}
+        self._csv_file = csv_file
+        self._csv = None
+        if csv_file is not None:
+            self._csv = csv.writer(csv_file)
+            self._csv.writerow(('frame', 'phase', 'start_ns', 'duration_ns'))
+
+    def phase(self, name):
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = Phase(self, name)
+            self.durations[name] = collections.deque(maxlen=self.window)
+            self.histograms[name] = collections.Counter()
+        return phase
+
+    def record(self, name, start, end):
+        duration = end - start
+        self.durations[name].append(duration)
+        self.histograms[name][duration.bit_length()] += 1
+        if self._csv is not None:
+            self._csv.writerow((self.frame, name, start, duration))
+
+    def next_frame(self):
+        self.frame += 1
+
+    def summary(self):
+        lines = ['%d frames' % self.frame,
+                 '%-10s %8s %10s %10s %10s %10s %10s' % ('phase', 'count', 'mean us', 'p50 us', 'p95 us',
+                                                         'p99 us', 'max us')]
+        for name, durations in self.durations.items():
+            if not durations:
+                continue
+            us = [d / 1000 for d in durations]
+            if len(us) > 1:
+                cuts = statistics.quantiles(us, n=100, method='inclusive')
+                p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+            else:
+                p50 = p95 = p99 = us[0]
+            lines.append('%-10s %8d %10.1f %10.1f %10.1f %10.1f %10.1f' % (
+                name, sum(self.histograms[name].values()), statistics.fmean(us), p50, p95, p99, max(us)))
+        for name, histogram in self.histograms.items():
+            buckets = '  '.join('<%gus:%d' % (2 ** bucket / 1000, count) for bucket, count in sorted(histogram.items()))
+            lines.append('%-10s %s' % (name, buckets))
+        return '\n'.join(lines)
+
+    def close(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv = None
+
+
+def phase(name):
+    """Context manager timing one phase of the current frame."""
+    if _active is None:
+        return _NULL
+    return _active.phase(name)
+
+
+def next_frame():
+    if _active is not None:
+        _active.next_frame()
+
+
+def active():
+    return _active
+
+
+def enable(csv_path=None, window=DEFAULT_WINDOW, report=True):
+    """Start profiling, optionally writing every phase to a CSV file. With
+    report the summary is printed to stderr on exit."""
+    global _active
+    profiler = Profiler(window, open(csv_path, 'w', newline='') if csv_path else None)
+    _active = profiler
+    if report:
+        atexit.register(_report, profiler)
+    return profiler
+
+
+def disable():
+    global _active
+    if _active is not None:
+        _active.close()
+    _active = None
+
+
+def _report(profiler):
+    profiler.close()
+    print(profiler.summary(), file=sys.stderr)
+
+
+_setting = os.environ.get(ENVIRONMENT)
+if _setting:
+    enable(None if _setting == '1' else _setting)
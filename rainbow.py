@@ -9,8 +9,11 @@
 import argparse
 import collections
 
-from periodicx import periodicx
+import numpy as np
+
+from framebuffer import blit
 from pyledstrip import LedStrip
+from scheduler import periodic
 
 
 Color = collections.namedtuple('Color', ['r', 'g', 'b'])
@@ -26,52 +29,42 @@ class Rainbow:
             Color(1.0, 0.25, 0),  # orange
             Color(1.0, 0, 0),     # red
     ]
+    STEPS = 16
 
     def __init__(self, strip: LedStrip):
         self.strip = strip
-        self.rainbow = [Color(0.0, 0.0, 0.0)] * 450
-        self.init_colors()
+        self.cycle = self.init_colors()
+        # One strip length plus one full cycle, so every scroll offset is a
+        # contiguous slice of this array.
+        repeats = -(-(strip.led_count + len(self.cycle)) // len(self.cycle))
+        self.rainbow = np.ascontiguousarray(np.tile(self.cycle, (repeats, 1)))
         self.i = 0
-    
+
     def color(self, start: Color, end: Color, steps: int):
-        """Interpolates the steps between start and end."""
-        result = [start]
-        r_delta = (end.r - start.r) / (steps - 1)
-        g_delta = (end.g - start.g) / (steps - 1)
-        b_delta = (end.b - start.b) / (steps - 1)
-        for i in range(0, steps-2):
-            result.append(Color(
-                result[-1].r + r_delta,
-                result[-1].g + g_delta,
-                result[-1].b + b_delta,
-            ))
-        return result
+        """Interpolates the steps between start and end, end excluded."""
+        start = np.asarray(start, dtype=np.float32)
+        end = np.asarray(end, dtype=np.float32)
+        ramp = np.arange(steps - 1, dtype=np.float32)[:, np.newaxis] / (steps - 1)
+        return start + ramp * (end - start)
 
     def init_colors(self):
-        n = 0
-        for k in range(0, 5):
-            # Cycle through the base colors.
-            for i in range(0, len(self.BASE_COLORS)):
-                start = self.BASE_COLORS[i]
-                end = self.BASE_COLORS[(i + 1) % len(self.BASE_COLORS)]
-                for cols in self.color(start, end, 16):
-                    self.rainbow[n] = cols
-                    n += 1
+        """One cycle through the base colors, with the blue rail dampened."""
+        cycle = np.concatenate([
+            self.color(start, self.BASE_COLORS[(i + 1) % len(self.BASE_COLORS)], self.STEPS)
+            for i, start in enumerate(self.BASE_COLORS)
+        ])
+        cycle[:, 2] *= cycle[:, 2]
+        return cycle
 
     def update(self):
-        self.strip.clear()
-        if self.i >= 90:
-           self.i = -1
-        self.i += 1
-        for j in range(self.i, 300 + self.i):
-            cols = self.rainbow[j]
-            self.strip.add_rgb(j - self.i, cols.r, cols.g, cols.b * cols.b)
+        self.i = (self.i + 1) % len(self.cycle)
+        blit(self.strip, self.rainbow[self.i:self.i + self.strip.led_count])
         self.strip.transmit()
     
 
 def main(args):
     strip = LedStrip(args=args, loop=True)
-    periodicx(Rainbow(strip).update, Rainbow.PERIOD)
+    periodic(Rainbow(strip).update, Rainbow.PERIOD)
 
 
 if __name__ == '__main__':
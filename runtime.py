@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Event loop for effects that take input. Frame ticks, keyboard input and
+# audio all arrive as callbacks on one asyncio loop, so an effect reacts to
+# input without polling stdin every frame and without blocking on audio:
+#
+#   every()     frames on the monotonic loop clock, with the Scheduler's
+#               deadlines, skip policy and next-change holds
+#   on_stdin()  called with whatever text arrives on stdin, woken by the
+#               loop's selector instead of non-blocking reads
+#   on_audio()  called with the newest analyzed block of an AudioCapture,
+#               handed over from PyAudio's callback thread
+#
+# Callbacks all run on the loop's thread, one at a time, and so need no
+# locks between them.
+
+import asyncio
+import os
+import stat
+import sys
+
+from scheduler import MAX_SLEEP, SKIP, Scheduler
+
+
+class Runtime:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._frame_sources = []
+        self._readers = []
+        self._captures = []
+
+    def every(self, period, func, *args, policy=SKIP, max_idle=None):
+        """Call func(*args) once per period while running, like periodic().
+        Returns the Scheduler for its stats."""
+        scheduler = Scheduler(period, policy, max_idle=max_idle, clock=self.loop.time)
+        self._frame_sources.append((scheduler, asyncio.Event(), func, args))
+        return scheduler
+
+    async def _frames(self, scheduler, wakeup, func, args):
+        while True:
+            now = scheduler.clock()
+            if scheduler.deadline is None:
+                scheduler.deadline = now
+            if now < scheduler.deadline:
+                # an effect holding its frame may be woken early by input
+                try:
+                    await asyncio.wait_for(wakeup.wait(), min(scheduler.deadline - now, MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+                continue
+            scheduler.step(func, *args)
+
+    def wake(self):
+        """Render the next frame of every effect now, e.g. after input changed
+        what an effect that is holding its frame would show."""
+        now = self.loop.time()
+        for scheduler, wakeup, _, _ in self._frame_sources:
+            if scheduler.deadline is not None:
+                scheduler.deadline = min(scheduler.deadline, now)
+            wakeup.set()
+
+    def on_stdin(self, callback, stream=sys.stdin):
+        """Call callback(text) on the loop when input arrives. The terminal
+        is line buffered, so this is usually a line at a time. Input that
+        cannot be polled, like a regular file or /dev/null under nohup,
+        systemd or cron, is ignored and the effect runs without it."""
+        try:
+            fd = stream.fileno()
+            mode = os.fstat(fd).st_mode
+        except (AttributeError, ValueError, OSError):
+            print("stdin is not available, keyboard input is disabled", file=sys.stderr)
+            return
+        if not (os.isatty(fd) or stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)):
+            print("stdin is not a terminal or pipe, keyboard input is disabled", file=sys.stderr)
+            return
+
+        def read():
+            data = os.read(fd, 4096)
+            if not data:
+                self.loop.remove_reader(fd)  # end of input
+                self._readers.remove(fd)
+                return
+            callback(data.decode(errors='replace'))
+
+        try:
+            self.loop.add_reader(fd, read)
+        except (PermissionError, OSError) as e:
+            print("stdin cannot be polled (%s), keyboard input is disabled" % e, file=sys.stderr)
+            return
+        self._readers.append(fd)
+
+    def on_audio(self, capture, callback):
+        """Call callback(analysis) on the loop with the newest block the
+        capture analyzed. Blocks arriving while a handoff is still pending
+        replace each other and the capture counts them as dropped. The
+        capture is started by run() and stopped after it."""
+        pending = False
+
+        def deliver():
+            nonlocal pending
+            # a block arriving right after the read waits for the next one
+            # instead of scheduling a handoff that would read nothing new
+            value = capture.latest()
+            pending = False
+            callback(value)
+
+        def listener(value):
+            nonlocal pending
+            if not pending:
+                pending = True
+                self.loop.call_soon_threadsafe(deliver)
+
+        capture.listener = listener
+        self._captures.append(capture)
+
+    def run(self):
+        """Run until stop() or Ctrl+C."""
+        for capture in self._captures:
+            capture.start()
+        tasks = [self.loop.create_task(self._frames(*source)) for source in self._frame_sources]
+        for task in tasks:
+            task.add_done_callback(self._frames_done)
+        try:
+            self.loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            for capture in self._captures:
+                capture.stop()
+            for fd in self._readers:
+                self.loop.remove_reader(fd)
+            self.loop.close()
+        # an effect that raised ends the run, report it like periodic() would
+        for task in tasks:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+    def _frames_done(self, task):
+        if not task.cancelled():
+            self.loop.stop()
+
+    def stop(self):
+        self.loop.stop()
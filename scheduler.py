@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Frame scheduler. Frames are started at fixed deadlines on the monotonic
+# clock (start + n * period), so render time does not add up to drift. When
+# a frame overruns its slot the policy decides what happens to the missed
+# deadlines: SKIP drops them and realigns to the next slot on the grid,
+# CATCH_UP runs the missed frames back to back (up to max_catch_up).
+#
+# Effects whose output only changes now and then can return the number of
+# seconds until their next visual change from their update. The scheduler
+# then sleeps until that point (at most max_idle) instead of polling, and
+# the frame on the strip stays as it is in the meantime.
+
+import collections
+import math
+import statistics
+import time
+
+import profiler
+
+SKIP = 'skip'
+CATCH_UP = 'catch_up'
+MAX_SLEEP = 60.0
+
+
+class FrameStats:
+    """Rolling timing statistics over the last `window` frames."""
+
+    def __init__(self, period: float, window: int = 300):
+        self.period = period
+        self.frames = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.lateness = collections.deque(maxlen=window)
+        self.starts = collections.deque(maxlen=window)
+        self.durations = collections.deque(maxlen=window)
+
+    def record(self, deadline: float, start: float, end: float):
+        self.frames += 1
+        if end - start > self.period:
+            self.overruns += 1
+        self.lateness.append(start - deadline)
+        self.starts.append(start)
+        self.durations.append(end - start)
+
+    @property
+    def fps(self):
+        if len(self.starts) < 2 or self.starts[-1] == self.starts[0]:
+            return 0.0
+        return (len(self.starts) - 1) / (self.starts[-1] - self.starts[0])
+
+    @property
+    def jitter(self):
+        """Standard deviation of the frame start lateness in seconds."""
+        if len(self.lateness) < 2:
+            return 0.0
+        return statistics.pstdev(self.lateness)
+
+    @property
+    def max_lateness(self):
+        return max(self.lateness, default=0.0)
+
+    @property
+    def mean_duration(self):
+        if not self.durations:
+            return 0.0
+        return statistics.fmean(self.durations)
+
+    def __str__(self):
+        return 'fps %.1f/%.1f  jitter %.2f ms  late max %.2f ms  frame %.2f ms  overruns %d  skipped %d' % (
+            self.fps, 1 / self.period,
+            self.jitter * 1000, self.max_lateness * 1000, self.mean_duration * 1000,
+            self.overruns, self.skipped
+        )
+
+
+class Scheduler:
+    def __init__(self, period: float, policy: str = SKIP, max_catch_up: int = 5, max_idle: float = None,
+                 clock=time.monotonic, sleep=time.sleep):
+        if policy not in (SKIP, CATCH_UP):
+            raise ValueError('unknown policy %r' % policy)
+        self.period = period
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.max_idle = max_idle
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = FrameStats(period)
+        self.deadline = None
+
+    def wait(self):
+        """Sleep until the next deadline and return it."""
+        now = self.clock()
+        if self.deadline is None:
+            self.deadline = now
+        while now < self.deadline:
+            # in slices, a held effect may not change for a very long time
+            self.sleep(min(self.deadline - now, MAX_SLEEP))
+            now = self.clock()
+        return self.deadline
+
+    def advance(self, end: float):
+        """Move to the next deadline after a frame that finished at `end`."""
+        self.deadline += self.period
+        if end <= self.deadline:
+            return
+
+        missed = math.floor((end - self.deadline) / self.period)
+        if self.policy == CATCH_UP and missed < self.max_catch_up:
+            return
+        # realign to the first deadline that is still ahead
+        missed += 1
+        self.deadline += missed * self.period
+        self.stats.skipped += missed
+
+    def hold(self, start: float, delay: float):
+        """Push the next deadline back to `delay` seconds after `start`."""
+        if self.max_idle is not None:
+            delay = min(delay, self.max_idle)
+        self.deadline = max(self.deadline, start + delay)
+
+    def step(self, func, *args):
+        """Run the frame that is due now, after wait()."""
+        deadline = self.deadline
+        start = self.clock()
+        with profiler.phase('frame'):
+            next_change = func(*args)
+        end = self.clock()
+        profiler.next_frame()
+        self.stats.record(deadline, start, end)
+        self.advance(end)
+        if next_change is not None:
+            self.hold(start, next_change)
+
+    def run(self, func, *args, frames=None):
+        """Call func(*args) once per period, forever or for `frames` frames.
+        A number returned by func delays the next call by that many seconds."""
+        count = 0
+        while frames is None or count < frames:
+            self.wait()
+            self.step(func, *args)
+            count += 1
+
+
+def periodic(func, period, *args, policy=SKIP, max_idle=None):
+    """Drop-in replacement for periodicx(func, period, *args)."""
+    Scheduler(period, policy, max_idle=max_idle).run(func, *args)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Multi-process rendering. Every shard is one effect on a range of LEDs of
+# one strip, rendered by its own worker process into a shared-memory frame
+# buffer, so effects on different strips or segments run on separate cores.
+# The coordinator paces the frames, gathers the shards of every strip into
+# one frame and transmits each strip once. Each worker renders its effect at
+# the effect's own PERIOD through its Layer and hands back the previous
+# pixels on the frames in between.
+#
+# Each shard has two buffers. While the coordinator transmits frame n from
+# one of them the workers already render frame n + 1 into the other, so
+# what is shown lags one frame behind what is rendered.
+
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from compositor import Layer, load_effect
+from framebuffer import FrameBuffer
+from pyledstrip import LedStrip
+from scheduler import Scheduler
+
+DEFAULT_PERIOD = 1 / 60
+
+
+class Shard:
+    def __init__(self, strip, effect, start=0, stop=None):
+        """effect is a name as understood by compositor.load_effect, it is
+        created in the worker process on a strip of stop - start LEDs."""
+        self.strip = strip
+        self.effect = effect
+        self.start = start
+        self.stop = strip.led_count if stop is None else stop
+
+
+def _work(effect, memory_name, length, conn):
+    memory = shared_memory.SharedMemory(name=memory_name)
+    buffers = np.ndarray((2, length, 3), dtype=np.float32, buffer=memory.buf)
+    layer = Layer(length)
+    try:
+        load_effect(layer, effect)
+        while True:
+            frame = conn.recv()
+            if frame is None:
+                break
+            # start from the previous frame, effects may draw incrementally or
+            # skip frames that would not change
+            layer.pixels = buffers[frame % 2]
+            np.copyto(layer.pixels, buffers[(frame + 1) % 2])
+            layer.render()
+            conn.send(frame)
+    finally:
+        # views into the shared memory have to go before it can be closed
+        layer.pixels = None
+        del buffers
+        memory.close()
+
+
+class ShardedRenderer:
+    def __init__(self, shards, context=None):
+        self.shards = list(shards)
+        self.context = context or multiprocessing.get_context()
+        self.frame = 0
+        self._memories = []
+        self._buffers = []
+        self._conns = []
+        self._processes = []
+        # one frame per strip, shards are gathered into it before transmitting
+        self._frames = {}
+        for shard in self.shards:
+            self._frames.setdefault(id(shard.strip), (shard.strip, FrameBuffer(shard.strip.led_count)))
+
+    def start(self):
+        for shard in self.shards:
+            length = shard.stop - shard.start
+            memory = shared_memory.SharedMemory(create=True, size=2 * length * 3 * 4)
+            buffers = np.ndarray((2, length, 3), dtype=np.float32, buffer=memory.buf)
+            buffers.fill(0.0)
+            conn, child = self.context.Pipe()
+            process = self.context.Process(target=_work, args=(shard.effect, memory.name, length, child),
+                                           daemon=True)
+            process.start()
+            child.close()
+            self._memories.append(memory)
+            self._buffers.append(buffers)
+            self._conns.append(conn)
+            self._processes.append(process)
+
+        for conn in self._conns:
+            conn.send(self.frame)
+
+    def update(self):
+        """Wait for the current frame, start the next one and transmit."""
+        for conn in self._conns:
+            conn.recv()
+        current = self.frame % 2
+        self.frame += 1
+        for conn in self._conns:
+            conn.send(self.frame)
+
+        for shard, buffers in zip(self.shards, self._buffers):
+            _, frame = self._frames[id(shard.strip)]
+            frame.pixels[shard.start:shard.stop] = buffers[current]
+        for strip, frame in self._frames.values():
+            frame.show(strip)
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.recv()  # the frame still in flight
+                conn.send(None)
+            except (EOFError, OSError):
+                pass
+        for process in self._processes:
+            process.join()
+        self._buffers.clear()
+        for memory in self._memories:
+            memory.close()
+            memory.unlink()
+        self._memories.clear()
+        self._conns.clear()
+        self._processes.clear()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_shard(strip, spec):
+    """'effect[:start:stop]' -> Shard"""
+    name, *bounds = spec.split(':')
+    if bounds:
+        return Shard(strip, name, int(bounds[0]), int(bounds[1]))
+    return Shard(strip, name)
+
+
+def main(args):
+    strip = LedStrip(args=args)
+    shards = [parse_shard(strip, spec) for spec in args.shards]
+    with ShardedRenderer(shards) as renderer:
+        Scheduler(args.period).run(renderer.update)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render effects on strip segments in separate processes.')
+    LedStrip.add_arguments(parser)
+    parser.add_argument('--period', type=float, default=DEFAULT_PERIOD,
+                        help='Seconds per transmitted frame, effects render at their own PERIOD')
+    parser.add_argument('shards', nargs='+', metavar='EFFECT[:START:STOP]',
+                        help='Effect per segment, e.g. sines:0:150 fireworks:150:300')
+    main(parser.parse_args())
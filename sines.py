@@ -5,27 +5,45 @@ import argparse
 import math
 import time
 
-from periodicx import periodicx
+import numpy as np
+
+from framebuffer import FrameBuffer
 from pyledstrip import LedStrip
+from scheduler import periodic
+
+
+def _wrap(phase):
+    # reduce in double precision, wall clock seconds do not fit a float32
+    return np.float32(phase % (2 * math.pi))
 
 
 class Sines:
     PERIOD = 1 / 60
 
+    def __init__(self, strip):
+        self.frame = FrameBuffer(strip.led_count)
+        # spatial phase of each channel, only the time term changes per frame
+        self._phase_r = (self.frame.positions + 0) / 200.0 + 0.0
+        self._phase_g = (self.frame.positions + 100) / 200.0 + 1.3
+        self._phase_b = (self.frame.positions + 200) / 200.0 + 2.1
+
+    def render(self, t):
+        pixels = self.frame.pixels
+        np.sin(self._phase_r + _wrap((t + 0) / 2.5), out=pixels[:, 0])
+        np.sin(self._phase_g + _wrap((t + 7.5) / 1.75), out=pixels[:, 1])
+        np.sin(self._phase_b + _wrap((t + 25) / 3.25), out=pixels[:, 2])
+        pixels[:, 0] *= 0.5
+        pixels[:, 0] += 0.5
+        pixels[:, 1:] *= 0.5 * 0.5
+
     def update(self, strip):
-        for i in range(strip.led_count):
-            strip.set_pixel_rgb(
-                i,
-                0.5 + 0.5 * math.sin(float(time.time() + 0) / 2.5 + float(i + 0) / 200.0 + 0.0),
-                0.5 * 0.5 * math.sin(float(time.time() + 7.5) / 1.75 + float(i + 100) / 200.0 + 1.3),
-                0.5 * 0.5 * math.sin(float(time.time() + 25) / 3.25 + float(i + 200) / 200.0 + 2.1)
-            )
-        strip.transmit()
+        self.render(time.time())
+        self.frame.show(strip)
 
 
 def main(args):
     strip = LedStrip(args=args)
-    periodicx(Sines().update, Sines.PERIOD, strip)
+    periodic(Sines(strip).update, Sines.PERIOD, strip)
 
 
 if __name__ == '__main__':
@@ -4,8 +4,10 @@
 import argparse
 import time
 
-from periodicx import periodicx
+from framebuffer import FrameBuffer
 from pyledstrip import LedStrip
+from scheduler import periodic
+from splat import QUADRATIC
 
 
 class Smooth:
@@ -13,25 +15,22 @@ class Smooth:
 
     def __init__(self, strip):
         self.strip = strip
+        self.frame = FrameBuffer(strip.led_count)
         self.brightness = 0.3
 
     def set(self, pos: float):
-        p1 = int(pos)
-        p2 = p1 + 1
-        f1 = self.brightness * pow(min(abs(pos - p2) * 2, 1.0), 2)
-        f2 = self.brightness * pow(min(abs(pos - p1) * 2, 1.0), 2)
-        self.strip.set_rgb(p1, f1, f1, f1)
-        self.strip.set_rgb(p2, f2, f2, f2)
+        self.frame.add_rgb([pos], self.brightness, loop=True, kernel=QUADRATIC)
 
     def update(self):
-        self.strip.clear()
-        self.set(time.time() * 5)
-        self.strip.transmit()
+        self.frame.clear()
+        # wrap in double precision, float32 can't resolve wall-clock positions
+        self.set((time.time() * 5) % self.strip.led_count)
+        self.frame.show(self.strip)
 
 
 def main(args):
     strip = LedStrip(args=args, loop=True)
-    periodicx(Smooth(strip).update, Smooth.PERIOD)
+    periodic(Smooth(strip).update, Smooth.PERIOD)
 
 
 if __name__ == '__main__':
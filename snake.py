@@ -4,40 +4,126 @@
 import argparse
 import random
 
-from periodicx import periodicx
+import numpy as np
+
+from framebuffer import FrameBuffer
 from pyledstrip import LedStrip
+from scheduler import periodic
 
 random.seed()
 
 
-class Snake:
-    PERIOD = 1 / 60
-
-    food = None
-    snake = [0, 0, 0, 0]
-    velocity = 0
-    step = 0
-
-    def update(self, strip):
-        if self.food is None:
-            self.food = random.randrange(strip.led_count)
-            strip.set_pixel_rgb(self.food, 1, 0, 0)
-
-        for i, part in enumerate(self.snake[::-1]):
-            d = len(self.snake) - i + 1
-            d = 4 if d < 4 else d
-            d = max(1 / round(d / 4), 0.1)
-
-            if 0 <= part < strip.led_count:
-                if i % 4 < 2:
-                    strip.set_pixel_rgb(part, int(15 * d), int(40 * d), 0)
-                else:
-                    strip.set_pixel_rgb(part, 0, int(40 * d), int(10 * d))
-        if 0 <= self.snake[0] < strip.led_count:
-            strip.set_pixel_rgb(self.snake[0], 170, 100, 0)
-        strip.transmit()
-
-        if self.food > self.snake[0]:
+class Occupancy:
+    """Number of snake segments on every LED, shared by all snakes. Segments
+    may overlap, so this counts instead of flagging."""
+
+    def __init__(self, led_count):
+        self.led_count = led_count
+        self.counts = np.zeros(led_count, dtype=np.uint16)
+        self.used = 0
+
+    def add(self, cell):
+        if 0 <= cell < self.led_count:
+            if self.counts[cell] == 0:
+                self.used += 1
+            self.counts[cell] += 1
+
+    def remove(self, cell):
+        if 0 <= cell < self.led_count:
+            self.counts[cell] -= 1
+            if self.counts[cell] == 0:
+                self.used -= 1
+
+    def __contains__(self, cell):
+        return 0 <= cell < self.led_count and self.counts[cell] > 0
+
+    def sample_free(self):
+        """Random unoccupied LED, or None if the strip is full."""
+        free = self.led_count - self.used
+        if free <= 0:
+            return None
+        # rejection sampling while the strip is mostly free, otherwise pick
+        # from the list of free cells
+        if free * 4 >= self.led_count:
+            while True:
+                cell = random.randrange(self.led_count)
+                if self.counts[cell] == 0:
+                    return cell
+        return int(random.choice(np.flatnonzero(self.counts == 0)))
+
+
+class Body:
+    """Snake segments head first, in a ring buffer that grows when full, so
+    moving the head and the tail is O(1)."""
+
+    def __init__(self, cells):
+        self.cells = np.zeros(max(16, 2 * len(cells)), dtype=np.int64)
+        self.start = 0
+        self.length = len(cells)
+        self.cells[:self.length] = cells
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def head(self):
+        return int(self.cells[self.start])
+
+    def push_head(self, cell):
+        if self.length == len(self.cells):
+            self.cells = np.concatenate((self.ordered(), np.zeros(len(self.cells), dtype=np.int64)))
+            self.start = 0
+        self.start = (self.start - 1) % len(self.cells)
+        self.cells[self.start] = cell
+        self.length += 1
+
+    def pop_tail(self):
+        self.length -= 1
+        return int(self.cells[(self.start + self.length) % len(self.cells)])
+
+    def ordered(self):
+        """All segments, head first."""
+        end = self.start + self.length
+        if end <= len(self.cells):
+            return self.cells[self.start:end]
+        return np.concatenate((self.cells[self.start:], self.cells[:end - len(self.cells)]))
+
+
+class Crawler:
+    def __init__(self, occupancy, start=0, length=4):
+        self.occupancy = occupancy
+        self.body = Body([start] * length)
+        for cell in self.body.ordered():
+            occupancy.add(cell)
+        self.food = None
+        self.food_color = (1, 0, 0)
+        self.velocity = 0
+        self.step = 0
+
+    def paint(self, pixels):
+        body = self.body.ordered()[::-1]  # tail first, segments nearer the head win
+        n = len(body)
+        i = np.arange(n)
+
+        # brightness fades with the distance from the head
+        d = np.maximum(n - i + 1, 4)
+        d = np.maximum(1 / np.round(d / 4), 0.1)
+        green = (40 * d).astype(int)
+        stripe = i % 4 < 2
+        colors = np.zeros((n, 3))
+        colors[:, 0] = np.where(stripe, (15 * d).astype(int), 0)
+        colors[:, 1] = green
+        colors[:, 2] = np.where(stripe, 0, (10 * d).astype(int))
+
+        inside = (body >= 0) & (body < len(pixels))
+        pixels[body[inside]] = colors[inside]
+
+        head = self.body.head
+        if 0 <= head < len(pixels):
+            pixels[head] = (170, 100, 0)
+
+    def move(self, pixels):
+        if self.food > self.body.head:
             self.velocity += 0.03
             self.velocity = 1 if self.velocity > 1 else self.velocity
         else:
@@ -48,25 +134,65 @@ class Snake:
 
         if self.step >= 1 or self.step <= -1:
             if self.step >= 1:
-                self.snake.insert(0, self.snake[0] + 1)
+                head = self.body.head + 1
                 self.step -= 1
-            elif self.step <= -1:
-                self.snake.insert(0, self.snake[0] - 1)
+            else:
+                head = self.body.head - 1
                 self.step += 1
-            if self.food not in self.snake:
-                strip.set_pixel_rgb(self.snake.pop(), 0, 0, 0)
+            self.body.push_head(head)
+            self.occupancy.add(head)
+
+            if head != self.food:
+                tail = self.body.pop_tail()
+                self.occupancy.remove(tail)
+                if 0 <= tail < len(pixels):
+                    pixels[tail] = 0
             else:
-                while self.food in self.snake:
-                    self.food = random.randrange(strip.led_count)
-                strip.set_pixel_rgb(self.food, 128, 0, 0)
+                food = self.occupancy.sample_free()
+                if food is not None:
+                    self.food = food
+                    self.food_color = (128, 0, 0)
+
+
+class Snake:
+    PERIOD = 1 / 60
+
+    def __init__(self, strip, count=1):
+        # the strip is never cleared, segments leaving the tail are blanked
+        self.frame = FrameBuffer(strip.led_count)
+        self.occupancy = Occupancy(strip.led_count)
+        self.snakes = [
+            Crawler(self.occupancy, start=i * strip.led_count // count)
+            for i in range(count)
+        ]
+
+    def update(self, strip):
+        pixels = self.frame.pixels
+        for snake in self.snakes:
+            if snake.food is None:
+                snake.food = self.occupancy.sample_free()
+
+        for snake in self.snakes:
+            snake.paint(pixels)
+        # food goes on top, another snake crawling over it or blanking its
+        # tail there must not hide it
+        for snake in self.snakes:
+            if snake.food is not None:
+                pixels[snake.food] = snake.food_color
+        self.frame.show(strip)
+
+        for snake in self.snakes:
+            if snake.food is not None:
+                snake.move(pixels)
 
 
 def main(args):
     strip = LedStrip(args=args)
-    periodicx(Snake().update, Snake.PERIOD, strip)
+    periodic(Snake(strip, args.snakes).update, Snake.PERIOD, strip)
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Example code for pyledstrip.')
     LedStrip.add_arguments(parser)
+    parser.add_argument('--snakes', type=int, default=1, help='Number of snakes')
     main(parser.parse_args())
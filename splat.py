@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Sub-pixel splatting. Draws many points at float positions into an (N, 3)
+# pixel array in one vectorized scatter-add. The kernel decides how a point
+# is spread over the LEDs around it:
+#
+#   NEAREST    all of it on the closest LED
+#   LINEAR     split between the two neighbours by distance, like
+#              LedStrip.add_rgb
+#   QUADRATIC  the two neighbours with a squared falloff that keeps both
+#              at full brightness around the midpoint, as in smooth.py
+#   gaussian() a wider normalized bell over several LEDs
+
+import math
+
+import numpy as np
+
+NEAREST = 'nearest'
+LINEAR = 'linear'
+QUADRATIC = 'quadratic'
+
+
+class Gaussian:
+    def __init__(self, sigma: float, radius: int = None):
+        self.sigma = sigma
+        self.radius = radius if radius is not None else max(1, math.ceil(3 * sigma))
+        self.offsets = np.arange(-self.radius, self.radius + 2)
+
+
+def gaussian(sigma, radius=None):
+    return Gaussian(sigma, radius)
+
+
+def footprint(positions, kernel=LINEAR):
+    """LED indices and weights a kernel spreads each position over, both as
+    (K, N) arrays for N positions."""
+    positions = np.asarray(positions, dtype=np.float64)
+    if kernel == NEAREST:
+        return np.floor(positions + 0.5).astype(np.int64)[np.newaxis], np.ones((1, len(positions)))
+
+    whole = np.floor(positions)
+    frac = positions - whole
+    whole = whole.astype(np.int64)
+
+    if kernel == LINEAR:
+        return np.stack((whole, whole + 1)), np.stack((1.0 - frac, frac))
+    if kernel == QUADRATIC:
+        near = np.minimum((1.0 - frac) * 2, 1.0)
+        far = np.minimum(frac * 2, 1.0)
+        return np.stack((whole, whole + 1)), np.stack((near * near, far * far))
+    if isinstance(kernel, Gaussian):
+        offsets = kernel.offsets[:, np.newaxis]
+        distance = offsets - frac
+        weights = np.exp(-0.5 * (distance / kernel.sigma) ** 2)
+        weights /= weights.sum(axis=0)
+        return whole + offsets, weights
+    raise ValueError('unknown kernel %r' % (kernel,))
+
+
+def splat(pixels, positions, colors, intensities=None, kernel=LINEAR, loop=False):
+    """Add colors ((N, 3), or one color for all) at float positions ((N,))
+    into pixels, optionally scaled by per-point intensities ((N,)). With
+    loop, points wrap around the end of the strip, otherwise whatever falls
+    outside is dropped."""
+    led_count = len(pixels)
+    indices, weights = footprint(positions, kernel)
+    if intensities is not None:
+        weights = weights * intensities
+    taps, count = indices.shape
+    channels = np.tile(np.broadcast_to(colors, (count, 3)), (taps, 1))
+
+    indices = indices.ravel()
+    weights = weights.ravel()
+    if loop:
+        indices = indices % led_count
+    else:
+        inside = (indices >= 0) & (indices < led_count)
+        indices = indices[inside]
+        weights = weights[inside]
+        channels = channels[inside]
+
+    for channel in range(3):
+        pixels[:, channel] += np.bincount(indices, weights * channels[:, channel], minlength=led_count)
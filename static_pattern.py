@@ -2,26 +2,32 @@
 # coding: utf-8
 
 import argparse
+import math
 
+from framebuffer import FrameBuffer
 from pyledstrip import LedStrip
 
 
-def main(args):
-    strip = LedStrip(args=args, loop=True)
-    strip.clear()
+class StaticPattern:
+    def __init__(self, strip, hsv=False, brightness=1):
+        self.frame = FrameBuffer(strip.led_count)
+
+        if hsv is True:
+            # --hsv
+            self.frame.set_hue(self.frame.positions / strip.led_count, brightness)
+        else:
+            # --blank
+            self.frame.set_hsv(1, 0, brightness)
 
-    brightness = 1
+    def update(self, strip):
+        self.frame.show(strip)
+        # never changes
+        return math.inf
 
-    if args.hsv is True:
-        # --hsv
-        for i in range(strip.led_count):
-            strip.set_hsv(i, i/strip.led_count, 1, brightness)
-    else:
-        # --blank
-        for i in range(strip.led_count):
-            strip.set_hsv(i, 1, 0, brightness)
 
-    strip.transmit()
+def main(args):
+    strip = LedStrip(args=args, loop=True)
+    StaticPattern(strip, args.hsv).update(strip)
 
 
 if __name__ == '__main__':
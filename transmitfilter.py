@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Transmit suppression. TransmitFilter wraps a LedStrip and drops transmits
+# of frames that are byte-identical to the last one sent, apart from a
+# keep-alive refresh. Only whole frames handed over through set_pixels()
+# (FrameBuffer.show, blit) are digested; any other drawing call goes
+# straight to the strip and makes the next transmit go out unconditionally.
+
+import time
+import zlib
+
+import numpy as np
+
+from framebuffer import blit
+
+DEFAULT_KEEPALIVE = 1.0
+
+
+class TransmitFilter:
+    def __init__(self, strip, keepalive=DEFAULT_KEEPALIVE, clock=time.monotonic):
+        self.strip = strip
+        self.keepalive = keepalive
+        self.clock = clock
+        self.sent = 0
+        self.saved = 0
+
+        self._frame = np.zeros((strip.led_count, 3), dtype=np.float32)
+        self._pending = False
+        self._digest = None
+        self._last_sent = None
+
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument('--keepalive', type=float, default=DEFAULT_KEEPALIVE,
+                            help='Resend unchanged frames after this many seconds')
+
+    def __getattr__(self, name):
+        # drawing directly on the strip, keep it after any pending frame
+        attr = getattr(self.strip, name)
+        if callable(attr):
+            self._flush()
+            self._digest = None
+        return attr
+
+    def _flush(self):
+        if self._pending:
+            blit(self.strip, self._frame)
+            self._pending = False
+
+    def set_pixels(self, pixels):
+        np.copyto(self._frame, pixels)
+        self._pending = True
+
+    def transmit(self):
+        now = self.clock()
+        if self._pending:
+            digest = zlib.crc32(self._frame)
+            if (digest == self._digest and self._last_sent is not None
+                    and now - self._last_sent < self.keepalive):
+                self._pending = False
+                self.saved += 1
+                return
+            self._flush()
+            self._digest = digest
+
+        self.strip.transmit()
+        self._last_sent = now
+        self.sent += 1
@@ -2,44 +2,55 @@
 # coding: utf-8
 
 import argparse
-import random
 
-from periodicx import periodicx
+import numpy as np
+
+from framebuffer import FrameBuffer, hsv_to_rgb
 from pyledstrip import LedStrip
+from scheduler import periodic
 
-_INDEX_POS = 0
-_INDEX_VELO = 1
-_INDEX_HUE = 2
-_INDEX_SAT = 3
 
 class Walker:
     VELO_MAX = 20 # LED / sec
     PERIOD = 1 / 60
+    SPACING = 5  # one walker every this many LEDs
 
     _VELO_MAX = VELO_MAX * PERIOD
+    # per frame random change of velocity, hue and saturation, one row each
+    _DRIFT_LOW = np.array([[-0.01], [-0.01], [-0.005]])
+    _DRIFT_HIGH = np.array([[0.01], [0.01], [0.01]])
 
-    def __init__(self, strip):
+    def __init__(self, strip, seed=None):
         self.strip = strip
-        self.walkers = [[pos, random.uniform(-self._VELO_MAX, self._VELO_MAX), random.uniform(0, 1), random.uniform(0, 1)] for pos in range(0, self.strip.led_count, 5)]
+        self.frame = FrameBuffer(strip.led_count)
+        self.rng = np.random.default_rng(seed)
+        self.pos = np.arange(0, strip.led_count, self.SPACING, dtype=np.float64)
+        count = len(self.pos)
+        self.velo = self.rng.uniform(-self._VELO_MAX, self._VELO_MAX, count)
+        self.hue = self.rng.uniform(0, 1, count)
+        self.sat = self.rng.uniform(0, 1, count)
 
     def update(self):
-        self.strip.clear()
-        for i in range(len(self.walkers)):
-            # update position
-            self.walkers[i][_INDEX_POS] = (self.walkers[i][_INDEX_POS] + self.walkers[i][_INDEX_VELO]) % self.strip.led_count
-            # update velocity
-            self.walkers[i][_INDEX_VELO] = max(min(self.walkers[i][_INDEX_VELO] + random.uniform(-0.01, 0.01), self._VELO_MAX), -self._VELO_MAX)
-            # change hue & saturation
-            self.walkers[i][_INDEX_HUE] = self.walkers[i][_INDEX_HUE] + random.uniform(-0.01, 0.01) % 1
-            self.walkers[i][_INDEX_SAT] = max(min(self.walkers[i][_INDEX_SAT] + random.uniform(-0.005, 0.01), 1), 0)
-            # add walker to strip
-            self.strip.add_hsv(self.walkers[i][_INDEX_POS], self.walkers[i][_INDEX_HUE], self.walkers[i][_INDEX_SAT], 1)
-        self.strip.transmit()
+        self.frame.clear()
+        # update position
+        self.pos += self.velo
+        self.pos %= self.strip.led_count
+        # update velocity, change hue & saturation
+        velo, hue, sat = self.rng.uniform(self._DRIFT_LOW, self._DRIFT_HIGH, (3, len(self.pos)))
+        self.velo += velo
+        np.clip(self.velo, -self._VELO_MAX, self._VELO_MAX, out=self.velo)
+        self.hue += hue
+        self.hue %= 1
+        self.sat += sat
+        np.clip(self.sat, 0, 1, out=self.sat)
+        # add all walkers to the frame at once
+        self.frame.add_rgb(self.pos, hsv_to_rgb(self.hue, self.sat, 1.0), loop=True)
+        self.frame.show(self.strip)
 
 
 def main(args):
     strip = LedStrip(args=args, loop=True)
-    periodicx(Walker(strip).update, Walker.PERIOD)
+    periodic(Walker(strip).update, Walker.PERIOD)
 
 
 if __name__ == '__main__':